@@ -0,0 +1,87 @@
+import random
+import time
+
+from nearest_neighbour import nearest_neighbour
+from christofides import christofides
+from local_search import LocalSearch
+from space_filling_curve import hilbert_curve
+
+# longest segment swapped by a double bridge kick
+KICK_SEGMENT_LENGTH = 50
+# number of kicks without improvement after which the search restarts from a new tour
+KICKS_BEFORE_RESTART = 100
+# estimated time of constructions relative to the time of preparing the local search (nearest neighbour lists),
+# both grow with the number of vertices, a construction is started only if its estimate fits in the remaining time
+CONSTRUCTION_COST = {'nearest_neighbour': 2, 'christofides': 8}
+
+
+def solve_anytime(graph, budget: float, seed=None, initial=None, target=None):
+    """
+    anytime solver, the first tour is created along the hilbert curve and improved by local search,
+    then nearest neighbour and christofides tours and iterated local search with double bridge kicks and restarts
+    from nearest neighbour tours keep improving the best tour until the budget runs out, constructions are
+    started only if their estimated time fits in the remaining budget, so the budget is exceeded only by
+    the hilbert curve and preparation of the local search, which take O(N log N) time
+    :param graph: class Graph
+    :param budget: wall-clock time in seconds
+    :param seed: seed of random choices of the solver
+    :param initial: sequence of vertices that form a hamiltonian circuit (e.g. best known tour) that is used
+    as the first tour instead of the hilbert curve tour
+    :param target: distance that is good enough, the solver stops as soon as the best tour is not longer
+    (e.g. lower bound increased by accepted optimality gap)
+    :return: best sequence of vertices that form a hamiltonian circuit, its distance and timeline of improvements
+    as a list of pairs in a format: (elapsed time in s, best distance)
+    """
+    rng = random.Random(seed)
+    start_time = time.perf_counter()
+    deadline = start_time + budget
+    timeline = []
+
+    local_search = LocalSearch(graph, hilbert_curve(graph) if initial is None else initial)
+    preparation_time = time.perf_counter() - start_time
+    local_search.run(deadline=deadline)
+    best_sequence = local_search.sequence()
+    best_distance = local_search.length
+    timeline.append((time.perf_counter() - start_time, best_distance))
+
+    algorithms = {'nearest_neighbour': lambda: nearest_neighbour(graph, rng.randrange(graph.N)),
+                  'christofides': lambda: christofides(graph)}
+    estimates = {name: cost * preparation_time for name, cost in CONSTRUCTION_COST.items()}
+    current_sequence, current_distance = best_sequence, best_distance
+    constructions = ['nearest_neighbour', 'christofides']
+    kicks_without_improvement = 0
+    while time.perf_counter() < deadline and graph.N >= 8 and (target is None or best_distance > target):
+        if not constructions and kicks_without_improvement >= KICKS_BEFORE_RESTART:
+            constructions.append('nearest_neighbour')
+            kicks_without_improvement = 0
+        # constructions that would not finish in time are skipped
+        while constructions and estimates[constructions[0]] > deadline - time.perf_counter():
+            constructions.pop(0)
+        kicked = not constructions
+        if kicked:
+            segment_length = min(KICK_SEGMENT_LENGTH, (graph.N - 2) // 2)
+            local_search.checkpoint()
+            local_search.double_bridge(rng.randrange(graph.N), rng.randint(1, segment_length),
+                                       rng.randint(1, segment_length))
+        else:
+            name = constructions.pop(0)
+            construction_time = time.perf_counter()
+            sequence = algorithms[name]()
+            estimates[name] = time.perf_counter() - construction_time
+            local_search.set_tour(sequence)
+            local_search.activate(*range(graph.N))
+        local_search.run(deadline=deadline)
+        distance = local_search.length
+
+        if not kicked or distance < current_distance - 1e-9:
+            current_sequence, current_distance = local_search.sequence(), distance
+            kicks_without_improvement = 0
+        else:
+            local_search.rollback()
+            kicks_without_improvement += 1
+
+        if current_distance < best_distance - 1e-9:
+            best_sequence, best_distance = current_sequence, current_distance
+            timeline.append((time.perf_counter() - start_time, best_distance))
+
+    return best_sequence, best_distance, timeline
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import json
+import multiprocessing
+import optparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from vertex import Graph
+from portfolio import PORTFOLIO_ALGORITHMS, solve
+from local_search import improve_tour
+from helper_functions import calculate_distance
+from loader import parse_chunk
+
+
+def parse_coordinates(points: list):
+    """
+    :param points: list of lines in any format accepted by loader (x, y or x y) or of pairs of numbers
+    :return: array of coordinates with shape (N, 2)
+    """
+    if points and isinstance(points[0], str):
+        return parse_chunk('\n'.join(points).encode())
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def parse_instances(lines, name: str):
+    """
+    split lines of a file into instances, every line contains points of one vertex in a format: x, y or x y,
+    instances are separated by empty lines and a line starting with # sets the name of the following instance,
+    lines are parsed later by workers so a malformed instance does not stop the batch
+    :param lines: iterable of lines
+    :param name: name of the file, instances without their own name are numbered after it
+    :return: generator of pairs in a format: (name of the instance, list of lines with points)
+    """
+    number, instance_name, points = 0, None, []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('#') or not line:
+            if points:
+                yield instance_name or f'{name}:{number}', points
+                number, instance_name, points = number + 1, None, []
+            if line.startswith('#'):
+                instance_name = line[1:].strip() or None
+            continue
+        points.append(line)
+    if points:
+        yield instance_name or (f'{name}:{number}' if number else name), points
+
+
+def read_instances(path: str):
+    """
+    :param path: file with one or more instances or a directory of such files
+    :return: generator of pairs in a format: (name of the instance, list of lines with coordinates)
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, file) for file in os.listdir(path))
+        files = [file for file in files if os.path.isfile(file)]
+    else:
+        files = [path]
+    for file in files:
+        with open(file, 'r') as f:
+            yield from parse_instances(f, os.path.basename(file))
+
+
+def solve_instance(task):
+    """
+    solve one instance, errors are returned as a part of the result so the batch goes on
+    :param task: tuple in a format: (number of the instance, name, points, algorithm, improve, seed),
+    points are in any format accepted by parse_coordinates
+    :return: dictionary with the name, distance, tour and timings in ms of the instance
+    """
+    index, name, points, algorithm, improve, seed = task
+    result = {'index': index, 'instance': name, 'algorithm': algorithm}
+    try:
+        start_time = time.perf_counter()
+        coordinates = parse_coordinates(points)
+        graph = Graph(len(coordinates), coordinates=coordinates)
+        graph_time = (time.perf_counter() - start_time) * 1000
+
+        sequence, distance, solve_time = solve(graph, algorithm, seed)
+        timings = {'graph': graph_time, 'solve': solve_time}
+        if improve:
+            start_time = time.perf_counter()
+            sequence = improve_tour(graph, sequence)
+            distance = calculate_distance(graph.adjacency_matrix, sequence)
+            timings['improve'] = (time.perf_counter() - start_time) * 1000
+
+        result.update(vertices=graph.N, distance=distance, tour=sequence, timings=timings)
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    return result
+
+
+def solve_batch(instances, algorithm='christofides', improve=False, seed=0, processes=None):
+    """
+    solve instances in a pool of processes, results are yielded as soon as they are finished
+    :param instances: iterable of pairs in a format: (name of the instance, points), points are lines in a format:
+    x, y or pairs of coordinates
+    :param algorithm: name of the algorithm from PORTFOLIO_ALGORITHMS
+    :param improve: improve every tour by local search
+    :param seed: seed of random choices of the algorithm, the same for every instance
+    :param processes: number of worker processes, all cpus if None, 1 solves instances in this process
+    :return: generator of results of solve_instance in order of completion
+    """
+    tasks = ((index, name, points, algorithm, improve, seed) for index, (name, points) in enumerate(instances))
+    if processes == 1:
+        yield from map(solve_instance, tasks)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(solve_instance, tasks)
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(usage='%prog [options] file_or_directory ...')
+    parser.add_option('--algorithm', dest='algorithm', default='christofides',
+                      help='Algorithm: ' + ', '.join(PORTFOLIO_ALGORITHMS))
+    parser.add_option('--improve', dest='improve', action='store_true', default=False,
+                      help='Improve every tour by 2-opt and or-opt local search')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+                      help='Seed of random choices of the algorithm')
+    parser.add_option('--processes', dest='processes', type='int',
+                      help='Number of worker processes, all cpus by default')
+
+    options, args = parser.parse_args()
+    if not args or options.algorithm not in PORTFOLIO_ALGORITHMS:
+        parser.print_help()
+        sys.exit(2)
+
+    instances = (instance for path in args for instance in read_instances(path))
+    failed = False
+    for result in solve_batch(instances, options.algorithm, options.improve, options.seed, options.processes):
+        failed = failed or 'error' in result
+        print(json.dumps(result), flush=True)
+    sys.exit(1 if failed else 0)
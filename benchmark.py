@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+import json
+import optparse
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from vertex import Graph, MAX_WIDTH, MAX_HEIGHT
+from nearest_neighbour import nearest_neighbour
+from cheapest_link import cheapest_link
+from christofides import christofides
+from helper_functions import calculate_distance, return_path_from_sequence_pairs
+
+# measured algorithms, graph measures only construction of the graph and its distance matrix
+ALGORITHMS = ['graph', 'nearest_neighbour', 'cheapest_link', 'christofides']
+# distributions of generated vertices
+DISTRIBUTIONS = ['uniform', 'clustered', 'grid']
+# average number of vertices in one cluster of the clustered distribution
+CLUSTER_SIZE = 100
+# standard deviation of coordinates of vertices around the center of their cluster
+CLUSTER_SPREAD = 20
+# measured values that are compared with a baseline, higher values are worse
+METRICS = ['time', 'peak_memory', 'distance']
+
+
+def generate_coordinates(size: int, distribution: str, seed: int):
+    """
+    generate integer coordinates of vertices, the same seed always gives the same coordinates
+    :param size: number of vertices
+    :param distribution: uniform, clustered or grid
+    :param seed: seed of the random generator
+    :return: array of coordinates with shape (size, 2)
+    """
+    rng = random.Random(seed)
+    if distribution == 'uniform':
+        points = [(rng.randint(0, MAX_WIDTH), rng.randint(0, MAX_HEIGHT)) for _ in range(size)]
+    elif distribution == 'clustered':
+        centers = [(rng.uniform(0, MAX_WIDTH), rng.uniform(0, MAX_HEIGHT))
+                   for _ in range(max(1, size // CLUSTER_SIZE))]
+        points = []
+        for _ in range(size):
+            x, y = rng.choice(centers)
+            points.append((min(max(round(rng.gauss(x, CLUSTER_SPREAD)), 0), MAX_WIDTH),
+                           min(max(round(rng.gauss(y, CLUSTER_SPREAD)), 0), MAX_HEIGHT)))
+    elif distribution == 'grid':
+        columns = max(1, int(np.ceil(np.sqrt(size))))
+        spacing = max(1, MAX_WIDTH // columns)
+        points = [((index % columns) * spacing, (index // columns) * spacing) for index in range(size)]
+    else:
+        raise ValueError(f'unknown distribution: {distribution}')
+
+    return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+
+def run_algorithm(algorithm: str, coordinates, matrix_free: bool):
+    """
+    :param algorithm: one of ALGORITHMS
+    :param coordinates: array of coordinates of vertices with shape (N, 2)
+    :param matrix_free: whether the graph stores only coordinates instead of the distance matrix
+    :return: function without arguments that runs the algorithm and returns length of its tour
+    (0 for construction of the graph)
+    """
+    if algorithm == 'graph':
+        def construct():
+            Graph(len(coordinates), matrix_free=matrix_free, coordinates=coordinates)
+            return 0.0
+        return construct
+
+    graph = Graph(len(coordinates), matrix_free=matrix_free, coordinates=coordinates)
+    if algorithm == 'nearest_neighbour':
+        return lambda: calculate_distance(graph.adjacency_matrix, nearest_neighbour(graph))
+    if algorithm == 'cheapest_link':
+        # the tour is reconstructed from edges inside the measured function, as in main.py and portfolio.py
+        return lambda: calculate_distance(graph.adjacency_matrix, return_path_from_sequence_pairs(cheapest_link(graph)))
+    if algorithm == 'christofides':
+        return lambda: calculate_distance(graph.adjacency_matrix, christofides(graph))
+    raise ValueError(f'unknown algorithm: {algorithm}')
+
+
+def measure(function, seed: int, repeats=1):
+    """
+    measure wall time and peak memory of a function, memory is traced in a separate run
+    because tracing slows down the function
+    :param function: function without arguments
+    :param seed: seed of the random module set before every run
+    :param repeats: number of timed runs, the fastest one is reported
+    :return: triplet in a format: (result of the function, time in ms, peak memory in bytes)
+    """
+    elapsed = float('inf')
+    for _ in range(repeats):
+        random.seed(seed)
+        start_time = time.perf_counter()
+        result = function()
+        elapsed = min(elapsed, (time.perf_counter() - start_time) * 1000)
+
+    random.seed(seed)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def run_benchmark(sizes: list, distributions=DISTRIBUTIONS, seeds=(0,), algorithms=ALGORITHMS, matrix_free=False,
+                  repeats=1):
+    """
+    run every algorithm on every combination of size, distribution and seed
+    :return: list of results, each in a format: {'algorithm', 'distribution', 'size', 'seed', 'time',
+    'peak_memory', 'distance'}, time is in ms and peak memory in bytes
+    """
+    results = []
+    for size in sizes:
+        for distribution in distributions:
+            for seed in seeds:
+                coordinates = generate_coordinates(size, distribution, seed)
+                for algorithm in algorithms:
+                    function = run_algorithm(algorithm, coordinates, matrix_free)
+                    distance, elapsed, peak = measure(function, seed, repeats)
+                    results.append({'algorithm': algorithm, 'distribution': distribution, 'size': size,
+                                    'seed': seed, 'time': elapsed, 'peak_memory': peak, 'distance': distance})
+
+    return results
+
+
+def result_key(result: dict):
+    return result['algorithm'], result['distribution'], result['size'], result['seed']
+
+
+def compare_with_baseline(results: list, baseline: list, threshold: float):
+    """
+    find results whose metrics are worse than in the baseline by more than threshold,
+    results without a matching baseline are skipped
+    :param results: list of results from run_benchmark
+    :param baseline: list of results of an earlier run
+    :param threshold: allowed relative increase of every metric, e.g. 0.1 for 10 %
+    :return: list of regressions, each in a format: {'algorithm', 'distribution', 'size', 'seed', 'metric',
+    'baseline', 'value'}
+    """
+    baseline = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        for metric in METRICS:
+            if result[metric] > previous[metric] * (1 + threshold) and result[metric] - previous[metric] > 1e-9:
+                regression = {key: result[key] for key in ('algorithm', 'distribution', 'size', 'seed')}
+                regression.update(metric=metric, baseline=previous[metric], value=result[metric])
+                regressions.append(regression)
+
+    return regressions
+
+
+def environment():
+    """
+    :return: description of the machine and versions that produced the results
+    """
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor()}
+
+
+def split_option(value: str, convert=str):
+    return [convert(item) for item in value.split(',') if item]
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser()
+    parser.add_option('--sizes', dest='sizes', default='1000,2000,4000,8000',
+                      help='Comma separated numbers of vertices')
+    parser.add_option('--distributions', dest='distributions', default=','.join(DISTRIBUTIONS),
+                      help='Comma separated distributions of vertices: uniform, clustered, grid')
+    parser.add_option('--seeds', dest='seeds', default='0',
+                      help='Comma separated seeds of generated vertices and of the algorithms')
+    parser.add_option('--algorithms', dest='algorithms', default=','.join(ALGORITHMS),
+                      help='Comma separated algorithms: graph, nearest_neighbour, cheapest_link, christofides')
+    parser.add_option('--repeats', dest='repeats', type='int', default=1,
+                      help='Number of timed runs of every algorithm, the fastest one is reported')
+    parser.add_option('--matrix-free', dest='matrix_free', action='store_true', default=False,
+                      help='Store only coordinates and compute distances on demand')
+    parser.add_option('--output', dest='output',
+                      help='File where results are written as JSON')
+    parser.add_option('--baseline', dest='baseline',
+                      help='JSON file with results of an earlier run to compare with')
+    parser.add_option('--threshold', dest='threshold', type='float', default=0.1,
+                      help='Allowed relative increase of time, memory and distance against the baseline')
+
+    options, args = parser.parse_args()
+
+    results = run_benchmark(split_option(options.sizes, int), split_option(options.distributions),
+                            split_option(options.seeds, int), split_option(options.algorithms),
+                            options.matrix_free, options.repeats)
+
+    print('algorithm, distribution, vertices, seed, time [ms], peak memory [bytes], bytes per vertex, distance')
+    for result in results:
+        print(f"{result['algorithm']}, {result['distribution']}, {result['size']}, {result['seed']}, "
+              f"{result['time']:.1f}, {result['peak_memory']}, {result['peak_memory'] / result['size']:.1f}, "
+              f"{result['distance']:.2f}")
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump({'environment': environment(), 'matrix_free': options.matrix_free, 'results': results}, f,
+                      indent=2)
+
+    if options.baseline:
+        with open(options.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, options.threshold)
+        for regression in regressions:
+            print(f"regression: {regression['algorithm']}, {regression['distribution']}, {regression['size']}, "
+                  f"{regression['seed']}, {regression['metric']} {regression['baseline']:.2f} -> "
+                  f"{regression['value']:.2f}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,198 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from vertex import Graph, DistanceMatrix
+from profiler import NULL_PROFILER
+from portfolio import solve
+
+# default bound of the total size of cached files in bytes
+CACHE_SIZE = 1 << 30
+
+
+def instance_key(coordinates):
+    """
+    :param coordinates: array of coordinates of vertices with shape (N, 2)
+    :return: hash of the coordinates that identifies the instance
+    """
+    coordinates = np.ascontiguousarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    return hashlib.sha256(coordinates.tobytes()).hexdigest()[:32]
+
+
+class DiskCache:
+    """
+    content-addressed cache of distance matrices and tours stored in a directory, files are addressed by the hash
+    of coordinates of an instance, the least recently used files are deleted when the cache grows over its size,
+    time of the last use of a file is kept as its modification time
+    """
+    def __init__(self, directory: str, max_size=CACHE_SIZE):
+        """
+        :param directory: directory of the cache, it is created if it does not exist
+        :param max_size: bound of the total size of cached files in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, coordinates, *parts):
+        """
+        :return: path of a file of the instance with the given coordinates, parts that are None are skipped
+        """
+        parts = [str(part) for part in parts if part is not None]
+        return os.path.join(self.directory, '.'.join([instance_key(coordinates)] + parts))
+
+    def hit(self, path: str):
+        """
+        :return: True if the file exists, its time of the last use is updated
+        """
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def write(self, path: str, save):
+        """
+        write a file atomically, so readers never see a partially written file, and evict old files
+        :param path: path of the file
+        :param save: function that writes the content into an open binary file
+        """
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                save(f)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    @contextlib.contextmanager
+    def lock(self, path: str):
+        """
+        exclusive lock of a file shared by processes and threads that use the same directory, it is held
+        on a lock file next to the file until the end of the with block
+        :param path: path of the locked file
+        """
+        with open(path + '.lock', 'ab') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def evict(self):
+        """
+        delete the least recently used files until the total size is within the bound of the cache
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(('.tmp', '.lock')):
+                status = entry.stat()
+                files.append((status.st_mtime_ns, entry.name, status.st_size))
+        total = sum(size for _, _, size in files)
+        for _, name, size in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def load_distances(self, coordinates, dtype=np.float64):
+        """
+        :return: memory-mapped condensed distance matrix of the coordinates or None if it is not cached
+        """
+        path = self.path(coordinates, 'distances', np.dtype(dtype).name, 'npy')
+        return np.load(path, mmap_mode='r') if self.hit(path) else None
+
+    def store_distances(self, coordinates, data):
+        """
+        :param coordinates: array of coordinates of vertices with shape (N, 2)
+        :param data: condensed distance matrix of the coordinates
+        """
+        path = self.path(coordinates, 'distances', data.dtype.name, 'npy')
+        self.write(path, lambda f: np.save(f, data))
+
+    def load_tour(self, coordinates, algorithm='best', seed=None):
+        """
+        :param coordinates: array of coordinates of vertices with shape (N, 2)
+        :param algorithm: name of the algorithm that created the tour, 'best' for the best known tour
+        :param seed: seed of the algorithm
+        :return: sequence of vertices that form a hamiltonian circuit and its distance or None if it is not cached
+        """
+        path = self.path(coordinates, 'tour', algorithm, seed, 'npz')
+        if not self.hit(path):
+            return None
+        with np.load(path) as tour:
+            return tour['sequence'].tolist(), float(tour['distance'])
+
+    def store_tour(self, coordinates, sequence: list, distance: float, algorithm='best', seed=None):
+        """
+        store a tour created by an algorithm, it also replaces the best known tour if it is shorter,
+        the comparison and replacement are done under a lock so concurrent writers never replace a shorter tour
+        :param coordinates: array of coordinates of vertices with shape (N, 2)
+        :param sequence: sequence of vertices that form a hamiltonian circuit
+        :param distance: distance of the hamiltonian circuit
+        :param algorithm: name of the algorithm that created the tour
+        :param seed: seed of the algorithm
+        :return: True if the tour is the new best known tour
+        """
+        def save(f):
+            np.savez(f, sequence=np.asarray(sequence, dtype=np.int64), distance=distance)
+
+        if algorithm != 'best':
+            self.write(self.path(coordinates, 'tour', algorithm, seed, 'npz'), save)
+        path = self.path(coordinates, 'tour', 'best', None, 'npz')
+        with self.lock(path):
+            best = self.load_tour(coordinates)
+            if best is not None and best[1] <= distance:
+                return False
+            self.write(path, save)
+        return True
+
+
+def cached_graph(cache: DiskCache, coordinates, dtype=np.float64, matrix_free=False, profiler=None):
+    """
+    create a graph whose distance matrix is loaded from the cache, or computed and stored when it is not cached
+    :param cache: class DiskCache
+    :param coordinates: array of coordinates of vertices with shape (N, 2)
+    :param dtype: type of stored distances
+    :param matrix_free: compute distances on demand instead of storing the distance matrix, nothing is cached
+    :param profiler: optional Profiler that measures construction of the graph
+    :return: class Graph
+    """
+    profiler = profiler or NULL_PROFILER
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    adjacency_matrix = None
+    if not matrix_free:
+        with profiler.phase('cache'):
+            data = cache.load_distances(coordinates, dtype)
+            profiler.count('hits' if data is not None else 'misses')
+        if data is not None:
+            adjacency_matrix = DistanceMatrix(coordinates, dtype, data)
+    graph = Graph(len(coordinates), dtype=dtype, matrix_free=matrix_free, adjacency_matrix=adjacency_matrix,
+                  coordinates=coordinates, profiler=profiler)
+    if not matrix_free and adjacency_matrix is None:
+        cache.store_distances(coordinates, graph.adjacency_matrix.data)
+    return graph
+
+
+def cached_solve(cache: DiskCache, graph, algorithm: str, seed: int):
+    """
+    run one algorithm like portfolio.solve, the tour of a repeated run with the same seed is loaded from the cache
+    :param cache: class DiskCache
+    :param graph: class Graph
+    :param algorithm: name of the algorithm from PORTFOLIO_ALGORITHMS
+    :param seed: seed of the algorithm
+    :return: sequence of vertices that form a hamiltonian circuit, its distance and time in ms, time is 0
+    if the tour was cached
+    """
+    tour = cache.load_tour(graph.coordinates, algorithm, seed)
+    if tour is not None:
+        return tour[0], tour[1], 0.0
+    sequence, distance, elapsed = solve(graph, algorithm, seed)
+    cache.store_tour(graph.coordinates, sequence, distance, algorithm, seed)
+    return sequence, distance, elapsed
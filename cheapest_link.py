@@ -1,67 +1,69 @@
-def check_cycle(start, current, previous, visited):
-    """
+from disjoint_set import DisjointSet
+from spatial_index import candidate_edges, complete_edges
+from profiler import NULL_PROFILER
+
+# number of nearest neighbours of every vertex whose edges are candidates for joining
+CANDIDATE_NEIGHBOURS = 10
+
 
-    :param start: starting vertex
-    :param current: current vertex that is being checked
-    :param previous: previous vertex to prevent loops
-    :param visited: already visited vertices with edges format: {vertex: [connected vertices]}
-    :return:
+def join_edges(edges, degrees: list, fragments: DisjointSet, sequence: list, number_of_vertices: int,
+               profiler=None):
     """
-    for vertex in visited[current]:
-        if vertex != previous and vertex != start:
-            return check_cycle(start, vertex, current, visited)
-        elif vertex == previous:
-            pass
-        else:
-            return True
-    return False
+    greedily add edges that do not create a vertex of degree 3 or close a cycle
+    :param edges: arrays of first vertices, second vertices and lengths of edges sorted from the shortest
+    :param degrees: number of edges already added to every vertex
+    :param fragments: disjoint set of vertices that are connected by added edges
+    :param sequence: added edges, new edges are appended to it
+    :param number_of_vertices: number of vertices in a graph
+    :param profiler: optional Profiler that counts scanned and added edges
+    :return: number of added edges
+    """
+    profiler = profiler or NULL_PROFILER
+    added = scanned = 0
+    for first_vertex, second_vertex in zip(edges[0].tolist(), edges[1].tolist()):
+        if len(sequence) == number_of_vertices - 1:
+            break
+        scanned += 1
+        if degrees[first_vertex] < 2 and degrees[second_vertex] < 2 and fragments.union(first_vertex, second_vertex):
+            degrees[first_vertex] += 1
+            degrees[second_vertex] += 1
+            sequence.append([first_vertex, second_vertex])
+            added += 1
+
+    profiler.count('edges_scanned', scanned)
+    profiler.count('edges_added', added)
+    return added
 
 
-def cheapest_link(graph) -> [list, float]:
+def cheapest_link(graph, k=CANDIDATE_NEIGHBOURS, profiler=None) -> list:
     """
-    algorithm that creates path through all vertices using cheapest-link algorithm
+    algorithm that creates path through all vertices using cheapest-link algorithm,
+    only edges to k nearest neighbours are considered, edges between all ends of fragments are used
+    only when fragments cannot be joined by edges to their nearest neighbours
     :param graph: class graph
-    :return: list containing path through all vertices and total distance
+    :param k: number of nearest neighbours of every vertex whose edges are candidates
+    :param profiler: optional Profiler that measures phases of the algorithm
+    :return: list of edges that form path through all vertices
     """
-    matrix = graph.get_sorted_distances()
-
+    profiler = profiler or NULL_PROFILER
     number_of_vertices = graph.N
-    visited = {}
+    degrees = [0] * number_of_vertices
+    fragments = DisjointSet(number_of_vertices)
     sequence = []
 
-    matrix_index = 0
-    while len(sequence) < number_of_vertices - 1:
-        first_vertex = matrix[matrix_index][0]
-        second_vertex = matrix[matrix_index][1]
-        if first_vertex in visited and second_vertex in visited:
-            if len(visited[first_vertex]) < 2 and len(visited[second_vertex]) < 2:
-                visited[first_vertex].append(second_vertex)
-                visited[second_vertex].append(first_vertex)
-                if not check_cycle(first_vertex, first_vertex, first_vertex, visited):
-                    sequence.append([first_vertex, second_vertex])
-                else:
-                    visited[first_vertex].remove(second_vertex)
-                    visited[second_vertex].remove(first_vertex)
-
-        # extend on one side
-        elif first_vertex in visited and second_vertex not in visited:
-            if len(visited[first_vertex]) < 2:
-                visited[first_vertex].append(second_vertex)
-                visited[second_vertex] = [first_vertex]
-                sequence.append([first_vertex, second_vertex])
-
-        elif first_vertex not in visited and second_vertex in visited:
-            if len(visited[second_vertex]) < 2:
-                visited[first_vertex] = [second_vertex]
-                visited[second_vertex].append(first_vertex)
-                sequence.append([first_vertex, second_vertex])
-
-        # create new partition
-        else:
-            visited[first_vertex] = [second_vertex]
-            visited[second_vertex] = [first_vertex]
-            sequence.append([first_vertex, second_vertex])
-
-        matrix_index += 1
+    with profiler.phase('cheapest_link'):
+        with profiler.phase('candidates'):
+            edges = candidate_edges(graph.adjacency_matrix, k)
+        with profiler.phase('join'):
+            join_edges(edges, degrees, fragments, sequence, number_of_vertices, profiler)
+        while len(sequence) < number_of_vertices - 1:
+            with profiler.phase('fragment_ends'):
+                profiler.count('rounds')
+                ends = [vertex for vertex in range(number_of_vertices) if degrees[vertex] < 2]
+                edges = candidate_edges(graph.adjacency_matrix, k, ends)
+                if not join_edges(edges, degrees, fragments, sequence, number_of_vertices, profiler):
+                    profiler.count('complete_rounds')
+                    join_edges(complete_edges(graph.adjacency_matrix, ends), degrees, fragments, sequence,
+                               number_of_vertices, profiler)
 
     return sequence
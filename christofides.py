@@ -1,7 +1,19 @@
 import random
-import copy
+import time
 
-from vertex import DIAGONAL_LENGTH
+import numpy as np
+
+from disjoint_set import DisjointSet
+from helper_functions import return_neighbours_from_pairs
+from profiler import NULL_PROFILER
+from matching import greedy_matching, blossom_matching
+from spatial_index import GridIndex, candidate_edges
+from vertex import DistanceOracle
+
+# graphs with more vertices use approximate MST from nearest neighbour candidate edges
+DENSE_MST_LIMIT = 5000
+# number of nearest neighbours of every vertex whose edges are candidates for MST
+MST_CANDIDATE_NEIGHBOURS = 10
 
 
 def check_cycle(neighbours: dict, start: int, prev: int, end: int):
@@ -24,52 +36,103 @@ def check_cycle(neighbours: dict, start: int, prev: int, end: int):
     return False
 
 
-def prims(graph):
+def dense_prims(adjacency_matrix):
     """
-    prims algorithm to create MST
-    :param graph: class Graph
-    :return: MST and dictionary of vertices and their neighbours
+    array based prims algorithm, distances of all vertices to the tree are updated at once in O(N) per added vertex
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :return: edges of MST in order in which they were added, each edge in a format: [vertex in tree, new vertex]
     """
+    number_of_vertices = len(adjacency_matrix)
+    minimal_spanning_tree = []
+    if number_of_vertices == 0:
+        return minimal_spanning_tree
 
-    matrix = graph.get_sorted_distances()
+    in_tree = np.zeros(number_of_vertices, dtype=bool)
+    in_tree[0] = True
+    distances = adjacency_matrix.distances_from(0).astype(np.float64)
+    distances[0] = np.inf
+    parents = np.zeros(number_of_vertices, dtype=np.int64)
 
-    number_of_vertices = graph.N
-    neighbours = {}
-    minimal_spanning_tree = []
+    for _ in range(number_of_vertices - 1):
+        vertex = int(np.argmin(distances))
+        minimal_spanning_tree.append([int(parents[vertex]), vertex])
+        in_tree[vertex] = True
+        distances[vertex] = np.inf
 
-    matrix_index = 0
-    while len(minimal_spanning_tree) < number_of_vertices - 1:
-        first_vertex = matrix[matrix_index][0]
-        second_vertex = matrix[matrix_index][1]
-        if first_vertex in neighbours and second_vertex in neighbours:
-            neighbours[first_vertex].append(second_vertex)
-            neighbours[second_vertex].append(first_vertex)
-            if not check_cycle(neighbours, first_vertex, first_vertex, first_vertex):
-                minimal_spanning_tree.append([first_vertex, second_vertex])
-            else:
-                neighbours[first_vertex].remove(second_vertex)
-                neighbours[second_vertex].remove(first_vertex)
-
-        # extend on one side
-        elif first_vertex in neighbours and second_vertex not in neighbours:
-            neighbours[first_vertex].append(second_vertex)
-            neighbours[second_vertex] = [first_vertex]
-            minimal_spanning_tree.append([first_vertex, second_vertex])
+        new_distances = adjacency_matrix.distances_from(vertex)
+        closer = (new_distances < distances) & ~in_tree
+        distances[closer] = new_distances[closer]
+        parents[closer] = vertex
 
-        elif first_vertex not in neighbours and second_vertex in neighbours:
-            neighbours[first_vertex] = [second_vertex]
-            neighbours[second_vertex].append(first_vertex)
-            minimal_spanning_tree.append([first_vertex, second_vertex])
+    return minimal_spanning_tree
 
-        # create new partition
-        else:
-            neighbours[first_vertex] = [second_vertex]
-            neighbours[second_vertex] = [first_vertex]
+
+def candidate_kruskal(adjacency_matrix, k=MST_CANDIDATE_NEIGHBOURS):
+    """
+    kruskals algorithm on a graph of edges between every vertex and its k nearest neighbours,
+    components of the candidate graph are connected by the closest pairs of vertices of components
+    that are neighbours in MST of their centroids, so the tree is an approximation of euclidean MST
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param k: number of nearest neighbours of every vertex
+    :return: edges of spanning tree in order in which they were added
+    """
+    number_of_vertices = len(adjacency_matrix)
+    components = DisjointSet(number_of_vertices)
+    minimal_spanning_tree = []
+
+    first, second, lengths = candidate_edges(adjacency_matrix, k)
+    for first_vertex, second_vertex in zip(first.tolist(), second.tolist()):
+        if components.union(first_vertex, second_vertex):
             minimal_spanning_tree.append([first_vertex, second_vertex])
+            if len(minimal_spanning_tree) == number_of_vertices - 1:
+                return minimal_spanning_tree
+
+    if number_of_vertices < 2:
+        return minimal_spanning_tree
+
+    roots = np.array([components.find(vertex) for vertex in range(number_of_vertices)])
+    roots, labels = np.unique(roots, return_inverse=True)
+    counts = np.bincount(labels)
+    centroids = np.stack([np.bincount(labels, adjacency_matrix.coordinates[:, axis]) / counts for axis in (0, 1)],
+                         axis=1)
+    members = np.split(np.argsort(labels, kind='stable'), np.cumsum(counts)[:-1])
+
+    # grid index of every component is built once over only the points of the component,
+    # vertices found in it are positions in members of the component
+    indices = {}
+    for first_component, second_component in dense_prims(DistanceOracle(centroids)):
+        smaller, larger = sorted((first_component, second_component), key=lambda component: len(members[component]))
+        if larger not in indices:
+            indices[larger] = GridIndex(adjacency_matrix.coordinates[members[larger]])
+        # vertices at the same location have the same closest vertex, so only one of them is queried
+        points, first = np.unique(adjacency_matrix.coordinates[members[smaller]], axis=0, return_index=True)
+        pairs = [(indices[larger].k_nearest_to(x, y, 1)[0], vertex) for vertex, (x, y) in
+                 zip(members[smaller][first].tolist(), points.tolist())]
+        (distance, larger_position), smaller_vertex = min(pairs)
+        minimal_spanning_tree.append(sorted([smaller_vertex, int(members[larger][larger_position])]))
+
+    return minimal_spanning_tree
+
+
+def prims(graph, method=None):
+    """
+    create MST of a graph, exact array based prims algorithm is used for graphs up to DENSE_MST_LIMIT vertices,
+    larger graphs use kruskals algorithm on nearest neighbour candidate edges
+    :param graph: class Graph
+    :param method: 'dense' or 'candidates' to override choice by size of the graph
+    :return: MST and dictionary of vertices and their neighbours
+    """
+    if method is None:
+        method = 'dense' if graph.N <= DENSE_MST_LIMIT else 'candidates'
 
-        matrix_index += 1
+    if method == 'dense':
+        minimal_spanning_tree = dense_prims(graph.adjacency_matrix)
+    elif method == 'candidates':
+        minimal_spanning_tree = candidate_kruskal(graph.adjacency_matrix)
+    else:
+        raise ValueError(f'unknown MST method: {method}')
 
-    return minimal_spanning_tree, neighbours
+    return minimal_spanning_tree, return_neighbours_from_pairs(minimal_spanning_tree)
 
 
 def return_vertices_with_odd_degree(MST: dict):
@@ -86,32 +149,26 @@ def return_vertices_with_odd_degree(MST: dict):
     return odd_vertices
 
 
-def perfect_pairing(adjacency_matrix: list, vertices: list):
+def perfect_pairing(adjacency_matrix, vertices: list, method='greedy', timings=None):
     """
-    pair vertices with odd degree to their closest vertex with odd degree
+    pair vertices with odd degree, greedy matching pairs the closest vertices first using nearest neighbour
+    candidates, blossom matching finds minimum weight perfect matching needed for 1.5 approximation guarantee
     :param adjacency_matrix: adjacency matrix of a graph
     :param vertices: list of vertices with odd degree
-    :param mst: MST of a graph
-    :return:
+    :param method: 'greedy' or 'blossom'
+    :param timings: optional dictionary, time of the matching in ms is stored under the name of the method
+    :return: list of pairs of vertices
     """
-    random.shuffle(vertices)
-    pairings = []
-    while vertices:
-        v = vertices.pop()
-        length = DIAGONAL_LENGTH
-        closest = vertices[0]
-        for u in vertices:
-            if u > v:
-                if v != u and adjacency_matrix[v][u - v - 1] < length:
-                    length = adjacency_matrix[v][u - v - 1]
-                    closest = u
-            else:
-                if v != u and adjacency_matrix[u][v - u - 1] < length:
-                    length = adjacency_matrix[u][v - u - 1]
-                    closest = u
-
-        pairings.append([v, closest])
-        vertices.remove(closest)
+    start_time = time.perf_counter()
+    if method == 'greedy':
+        pairings = greedy_matching(adjacency_matrix, vertices)
+    elif method == 'blossom':
+        pairings = blossom_matching(adjacency_matrix, vertices)
+    else:
+        raise ValueError(f'unknown matching method: {method}')
+
+    if timings is not None:
+        timings[method] = (time.perf_counter() - start_time) * 1000
     return pairings
 
 
@@ -129,31 +186,56 @@ def extend_MST(MST: dict, entensions: list):
     return MST
 
 
-def eulerian_cycle(start: int, current: int, extended_mst: dict, sequence: list):
+def eulerian_cycle(start: int, extended_mst: dict):
     """
-    recursively find an euler's tour through all vertices
+    iterative hierholzer algorithm that finds an euler's tour in O(E), edges are numbered
+    and every vertex keeps a pointer to the first of its edges that may be unused
     :param start: starting vertex
-    :param current: current vertex that is being visited
-    :param extended_mst: MST that is extended with edges of vertices that were odd in MST
-    :param sequence: sequence of vertices that form euler's tour
-    :return: param sequence (sequence of vertices that form euler's tour)
-    """
-    if sequence is not []:
-        if all(v in sequence for v in extended_mst):
-            return sequence
-
-    for vertex in extended_mst[current]:
-        sequence.append(current)
-        del extended_mst[vertex][extended_mst[vertex].index(current)]
-        del extended_mst[current][extended_mst[current].index(vertex)]
-        s = eulerian_cycle(start, vertex, extended_mst, sequence)
-        if s:
-            return s
-        if sequence is not []:
-            extended_mst[vertex].append(current)
-            extended_mst[current].append(vertex)
-            sequence.pop(-1)
-    return False
+    :param extended_mst: MST that is extended with edges of vertices that were odd in MST,
+    every edge is in lists of neighbours of both of its vertices, the dictionary is not modified
+    :return: sequence of vertices that form euler's tour (without returning to the starting vertex)
+    """
+    # k-th occurrence of an edge in neighbours of the smaller vertex and k-th occurrence
+    # in neighbours of the larger vertex get the same number
+    edge_numbers = {}
+    edge_vertices = []
+    for vertex in extended_mst:
+        for neighbour in extended_mst[vertex]:
+            if vertex < neighbour:
+                edge_numbers.setdefault((vertex, neighbour), []).append(len(edge_vertices))
+                # other vertex of an edge is obtained as edge_vertices[edge] ^ vertex
+                edge_vertices.append(vertex ^ neighbour)
+
+    occurrences = {}
+    incident_edges = {}
+    for vertex in extended_mst:
+        incident_edges[vertex] = []
+        for neighbour in extended_mst[vertex]:
+            key = (vertex, neighbour)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            incident_edges[vertex].append(edge_numbers[min(key), max(key)][occurrence])
+
+    used = [False] * len(edge_vertices)
+    pointers = dict.fromkeys(extended_mst, 0)
+    stack = [start]
+    sequence = []
+    while stack:
+        vertex = stack[-1]
+        edges = incident_edges[vertex]
+        pointer = pointers[vertex]
+        while pointer < len(edges) and used[edges[pointer]]:
+            pointer += 1
+        if pointer == len(edges):
+            pointers[vertex] = pointer
+            sequence.append(stack.pop())
+        else:
+            pointers[vertex] = pointer + 1
+            used[edges[pointer]] = True
+            stack.append(edge_vertices[edges[pointer]] ^ vertex)
+
+    sequence.reverse()
+    return sequence[:-1]
 
 
 def remove_duplicate_vertices(sequence: list, number_of_vertices: int):
@@ -175,26 +257,36 @@ def remove_duplicate_vertices(sequence: list, number_of_vertices: int):
     return new_sequence
 
 
-def christofides(graph):
+def christofides(graph, matching='greedy', timings=None, profiler=None):
     """
     wrapper function that assembles all functions together
     :param graph: class Graph
+    :param matching: method of pairing of vertices with odd degree, 'greedy' or 'blossom'
+    :param timings: optional dictionary for time of the matching in ms
+    :param profiler: optional Profiler that measures phases of the algorithm
     :return: list of vertices that form a hamiltonian circuit using christofides algorithm
     """
-    seq, tree = prims(graph)
-    odd_degrees = return_vertices_with_odd_degree(tree)
-    pairings = perfect_pairing(graph.adjacency_matrix, odd_degrees)
-    extended_mst = extend_MST(tree, pairings)
-    pairs = []
-    for vertex in extended_mst:
-        for vertex2 in extended_mst[vertex]:
-            pairs.append([vertex, vertex2])
-
-    sequence = None
-    while sequence is None:
-        start = random.choice(list(extended_mst.keys()))
-        MST = copy.deepcopy(extended_mst)
-        sequence = eulerian_cycle(start, start, MST, [])
-        sequence = remove_duplicate_vertices(sequence, graph.N)
-
-    return sequence
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('christofides'):
+        with profiler.phase('mst'):
+            seq, tree = prims(graph)
+            profiler.count('edges', len(seq))
+        with profiler.phase('odd_vertices'):
+            odd_degrees = return_vertices_with_odd_degree(tree)
+            profiler.count('vertices', len(odd_degrees))
+        with profiler.phase('matching'):
+            pairings = perfect_pairing(graph.adjacency_matrix, odd_degrees, matching, timings)
+            profiler.count('pairs', len(pairings))
+        with profiler.phase('extend_mst'):
+            extended_mst = extend_MST(tree, pairings)
+
+        with profiler.phase('eulerian_cycle'):
+            start = random.choice(list(extended_mst.keys()))
+            sequence = eulerian_cycle(start, extended_mst)
+            profiler.count('length', len(sequence))
+
+        with profiler.phase('remove_duplicates'):
+            hamiltonian_cycle = remove_duplicate_vertices(sequence, graph.N)
+            profiler.count('removed', len(sequence) + 1 - len(hamiltonian_cycle))
+
+    return hamiltonian_cycle
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import asyncio
+import contextlib
+import json
+import optparse
+import os
+import signal
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vertex import Graph
+from portfolio import PORTFOLIO_ALGORITHMS, solve
+from local_search import improve_tour
+from helper_functions import calculate_distance
+from loader import load_coordinates
+from cache import instance_key
+
+# default path of the unix domain socket of the daemon
+SOCKET_PATH = '/tmp/tsp-solver.sock'
+# number of recently used graphs that every worker process keeps in memory, requests of an instance are always
+# solved by the same worker process
+WARM_GRAPHS = 16
+# longest line of a request in bytes
+REQUEST_LIMIT = 1 << 26
+
+# recently used graphs of a worker process by the hash of their coordinates, the last one is the most recent
+warm_graphs = OrderedDict()
+
+
+def warm_graph(coordinates):
+    """
+    :param coordinates: array of coordinates of vertices with shape (N, 2)
+    :return: graph of the coordinates, reused if it was used recently by this process, and True if it was reused
+    """
+    key = instance_key(coordinates)
+    if key in warm_graphs:
+        warm_graphs.move_to_end(key)
+        return warm_graphs[key], True
+    graph = Graph(len(coordinates), coordinates=coordinates)
+    warm_graphs[key] = graph
+    if len(warm_graphs) > WARM_GRAPHS:
+        warm_graphs.popitem(last=False)
+    return graph, False
+
+
+def worker_index(request: dict, workers: int):
+    """
+    requests of the same instance are routed to the same worker process, so that they find its graph warm
+    :param request: dictionary in a format accepted by solve_request
+    :param workers: number of worker processes
+    :return: index of the worker process, 0 if the coordinates are invalid (the worker reports the error)
+    """
+    try:
+        key = instance_key(np.asarray(request['coordinates'], dtype=np.float64))
+    except (KeyError, TypeError, ValueError):
+        return 0
+    return int(key, 16) % workers
+
+
+def solve_request(request: dict):
+    """
+    solve one request in a worker process, errors are returned as a part of the response
+    :param request: dictionary in a format: {'coordinates': list of pairs, 'algorithm', 'improve', 'seed'},
+    only coordinates are required
+    :return: dictionary with the distance, tour and timings in ms, 'warm' is True if the graph was reused
+    """
+    response = {}
+    try:
+        algorithm = request.get('algorithm', 'christofides')
+        start_time = time.perf_counter()
+        coordinates = np.asarray(request['coordinates'], dtype=np.float64)
+        if coordinates.ndim != 2 or coordinates.shape[1] != 2 or len(coordinates) < 3:
+            raise ValueError('coordinates must be a list of at least 3 pairs')
+        graph, warm = warm_graph(coordinates)
+        graph_time = (time.perf_counter() - start_time) * 1000
+
+        sequence, distance, solve_time = solve(graph, algorithm, request.get('seed', 0))
+        timings = {'graph': graph_time, 'solve': solve_time}
+        if request.get('improve'):
+            start_time = time.perf_counter()
+            sequence = improve_tour(graph, sequence)
+            distance = calculate_distance(graph.adjacency_matrix, sequence)
+            timings['improve'] = (time.perf_counter() - start_time) * 1000
+
+        response.update(algorithm=algorithm, vertices=graph.N, distance=distance, tour=[int(v) for v in sequence],
+                        warm=warm, timings=timings)
+    except Exception as error:
+        response['error'] = f'{type(error).__name__}: {error}'
+    return response
+
+
+async def handle_connection(reader, writer, executors):
+    """
+    answer requests of one client, every line is one request in JSON and every answer is one line of JSON,
+    requests of different clients are solved concurrently by the worker processes, a request longer than
+    REQUEST_LIMIT is answered by an error and the connection is closed
+    :param executors: list of single process executors, one for every worker process
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:  # the rest of the over-long line can not be told apart from the next request
+                writer.write(json.dumps({'error': f'request is longer than {REQUEST_LIMIT} bytes'}).encode() + b'\n')
+                await writer.drain()
+                break
+            if not line:
+                break
+            start_time = time.perf_counter()
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('request must be a JSON object')
+            except ValueError as error:
+                response = {'error': f'invalid request: {error}'}
+            else:
+                executor = executors[await asyncio.to_thread(worker_index, request, len(executors))]
+                response = await loop.run_in_executor(executor, solve_request, request)
+                if 'id' in request:
+                    response['id'] = request['id']
+            response.setdefault('timings', {})['total'] = (time.perf_counter() - start_time) * 1000
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_server(path: str, processes=None, stop=None, ready=None):
+    """
+    serve requests on a unix domain socket until stop is set
+    :param path: path of the socket, an existing file is replaced
+    :param processes: number of worker processes, all cpus if None
+    :param stop: asyncio.Event that stops the server, SIGINT and SIGTERM also stop it
+    :param ready: function called when the server accepts connections
+    """
+    if stop is None:
+        stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, stop.set)
+        except (RuntimeError, ValueError):  # not the main thread
+            pass
+    if os.path.exists(path):
+        os.unlink(path)
+
+    with contextlib.ExitStack() as stack:
+        executors = [stack.enter_context(ProcessPoolExecutor(1)) for _ in range(processes or os.cpu_count())]
+        server = await asyncio.start_unix_server(
+            lambda reader, writer: handle_connection(reader, writer, executors), path, limit=REQUEST_LIMIT)
+        try:
+            if ready:
+                ready()
+            await stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def send_request(path: str, request: dict):
+    """
+    client of the daemon
+    :param path: path of the socket of the daemon
+    :param request: dictionary in a format accepted by solve_request
+    :return: response of the daemon
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(request).encode() + b'\n')
+        with connection.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(usage='%prog [options]\n       %prog --client [options] file')
+    parser.description = 'Solver daemon that keeps recently used graphs in memory, or its client'
+    parser.add_option('--socket', dest='socket', default=SOCKET_PATH,
+                      help='Path of the unix domain socket')
+    parser.add_option('--processes', dest='processes', type='int',
+                      help='Number of worker processes of the daemon, all cpus by default')
+    parser.add_option('--client', dest='client', action='store_true', default=False,
+                      help='Send the coordinates in file to the daemon and print its response')
+    parser.add_option('--algorithm', dest='algorithm', default='christofides',
+                      help='Algorithm of the client request: ' + ', '.join(PORTFOLIO_ALGORITHMS))
+    parser.add_option('--improve', dest='improve', action='store_true', default=False,
+                      help='Improve the tour of the client request by local search')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+                      help='Seed of random choices of the algorithm of the client request')
+
+    options, args = parser.parse_args()
+    if options.client:
+        if len(args) != 1:
+            parser.print_help()
+            sys.exit(2)
+        request = {'coordinates': load_coordinates(args[0]).tolist(), 'algorithm': options.algorithm,
+                   'improve': options.improve, 'seed': options.seed}
+        response = send_request(options.socket, request)
+        print(json.dumps(response))
+        sys.exit(1 if 'error' in response else 0)
+
+    asyncio.run(run_server(options.socket, options.processes,
+                           ready=lambda: print(f'listening on {options.socket}', flush=True)))
@@ -0,0 +1,32 @@
+class DisjointSet:
+    """
+    union-find structure over vertices 0..N-1 with union by size and path halving
+    """
+    def __init__(self, N):
+        self.parent = list(range(N))
+        self.size = [1] * N
+
+    def find(self, vertex: int):
+        """
+        :return: representative of the set that contains vertex
+        """
+        parent = self.parent
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    def union(self, first: int, second: int):
+        """
+        merge sets that contain first and second vertex
+        :return: False if both vertices were already in the same set, True otherwise
+        """
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return True
@@ -1,6 +1,11 @@
-import matplotlib.pyplot as plt
+import numpy as np
 
-from vertex import MAX_WIDTH, MAX_HEIGHT
+from tour import Tour
+
+# vertices are labelled by their numbers only in graphs with at most this many vertices
+LABELLED_VERTICES = 200
+# at most this many vertices are drawn as points, larger graphs show an evenly spaced sample
+PLOTTED_VERTICES = 20000
 
 
 def return_leaf(neighbours: dict):
@@ -43,17 +48,77 @@ def travers(current: int, prev: int, path: list, neighbours: dict):
     create a path from dict of neighbours
     :param current: current vertex
     :param prev: previous vertex
-    :param path: path from neighbours that is recursively created from one leaf to another
+    :param path: path from neighbours that is iteratively created from one leaf to another
     :param neighbours: dict of all vertices and their neighbours
     :return: path from one leaf to another
     """
-    path.append(current)
+    while True:
+        path.append(current)
+        if len(path) == len(neighbours):
+            return path
+        for vertex in neighbours[current]:
+            if vertex != prev:
+                prev, current = current, vertex
+                break
+        else:
+            return None
+
 
-    if len(path) == len(neighbours):
-        return path
-    for vertex in neighbours[current]:
-        if vertex != prev:
-            return travers(vertex, current, path, neighbours)
+def path_from_pairs(pairs, number_of_vertices=None):
+    """
+    array based conversion of edges of a path or a cycle to a sequence of vertices in O(N),
+    the path starts at the end that appears first in pairs
+    :param pairs: array of pairs of vertices with shape (M, 2)
+    :param number_of_vertices: all vertices are smaller than this number, the largest vertex + 1 if None
+    :return: list of vertices in order that form hamiltonian circuit (starting vertex at the end)
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        return []
+    ends = pairs.ravel()
+    others = pairs[:, ::-1].ravel()
+    if number_of_vertices is None:
+        number_of_vertices = int(ends.max()) + 1
+    degrees = np.bincount(ends, minlength=number_of_vertices)
+    if degrees.max() > 2:
+        raise ValueError('a vertex has more than two neighbours')
+
+    # the first neighbour of a vertex comes from its first occurrence in pairs, the second from the other one
+    positions = np.arange(len(ends))
+    first_position = np.full(number_of_vertices, len(ends))
+    np.minimum.at(first_position, ends, positions)
+    is_first = first_position[ends] == positions
+    first_neighbour = np.full(number_of_vertices, -1, dtype=np.int64)
+    second_neighbour = np.full(number_of_vertices, -1, dtype=np.int64)
+    first_neighbour[ends[is_first]] = others[is_first]
+    second_neighbour[ends[~is_first]] = others[~is_first]
+
+    leaves = np.flatnonzero(degrees == 1)
+    start = int(leaves[np.argmin(first_position[leaves])]) if len(leaves) else int(ends[0])
+    first_neighbour, second_neighbour = first_neighbour.tolist(), second_neighbour.tolist()
+    path = [start]
+    previous, current = -1, start
+    for _ in range(np.count_nonzero(degrees) - 1):
+        following = first_neighbour[current]
+        if following == previous:
+            following = second_neighbour[current]
+        # the walk ends early at the other end of a path or at the start of a cycle if there are more components
+        if following < 0 or following == start:
+            raise ValueError('pairs do not form a single path or cycle')
+        previous, current = current, following
+        path.append(current)
+
+    path.append(start)
+    return path
+
+
+def pairs_from_path(sequence):
+    """
+    :param sequence: sequence of vertices
+    :return: array with shape (len(sequence) - 1, 2) of pairs of consecutive vertices
+    """
+    sequence = np.asarray(sequence, dtype=np.int64)
+    return np.stack([sequence[:-1], sequence[1:]], axis=1)
 
 
 def return_path_from_sequence_pairs(sequence: list):
@@ -62,51 +127,96 @@ def return_path_from_sequence_pairs(sequence: list):
     :param sequence: array of pairs of vertices
     :return: array of vertices in order that form hamiltonian circuit
     """
-    path = None
-    if all(len(pair) == 2 for pair in sequence):
-        neighbours = return_neighbours_from_pairs(sequence)
-        current = return_leaf(neighbours)
-        path = travers(current, current, [], neighbours)
-        path.append(current)
-    return path
+    pairs = np.asarray(sequence, dtype=np.int64) if len(sequence) else np.empty((0, 2), dtype=np.int64)
+    if pairs.ndim != 2 or pairs.shape[1] != 2:
+        return None
+    return path_from_pairs(pairs)
 
 
-def calculate_distance(adjacency_matrix: list, sequence: list):
+def calculate_distance(adjacency_matrix, sequence: list):
     """
     calculates distance of hamiltonian circuit
     :param adjacency_matrix: adjacency matrix of a graph
-    :param sequence: array of vertices in order that form hamiltonian circuit
+    :param sequence: array of vertices in order that form hamiltonian circuit, or Tour whose cached length is
+    returned without scanning it
     :return:
     """
-    total_distance = 0
-    for vertex_index in range(len(sequence)-1):
-        first_vertex = sequence[vertex_index]
-        second_vertex = sequence[vertex_index+1]
-        if first_vertex < second_vertex:
-            total_distance += adjacency_matrix[first_vertex][second_vertex-first_vertex-1]
-        else:
-            total_distance += adjacency_matrix[second_vertex][first_vertex-second_vertex-1]
+    if isinstance(sequence, Tour) and sequence.adjacency_matrix is adjacency_matrix:
+        return sequence.length
+    total_distance = adjacency_matrix.distances(sequence[:-1], sequence[1:]).sum(dtype=np.float64)
 
-    return total_distance
+    return float(total_distance)
 
 
-def plot_graph(graph, sequence: list, title: str):
+def show_or_save(draw, path=None):
+    """
+    draw a figure and show it in a window or save it to a file, matplotlib is imported only here
+    because it is slow to import and not needed for solving, saving does not need a display
+    :param draw: function that draws into given axes
+    :param path: file where the figure is saved in a format given by its extension (e.g. png or svg),
+    the figure is shown in a window if None
+    """
+    if path is None:
+        import matplotlib.pyplot as plt
+        figure, axes = plt.subplots()
+        draw(axes)
+        plt.show()
+    else:
+        from matplotlib.figure import Figure
+        figure = Figure()
+        draw(figure.add_subplot())
+        figure.savefig(path)
+
+
+def draw_tour(axes, graph, sequence: list, title: str):
+    """
+    draw hamiltonian circuit as a single collection of lines, only a sample of vertices is drawn in large graphs
+    and only small graphs have labels of vertices
+    :param axes: matplotlib axes
+    :param graph: class graph
+    :param sequence: sequence of vertices that form a hamiltonian circuit
+    :param title: title of the graph
+    """
+    from matplotlib.collections import LineCollection
+
+    coordinates = graph.coordinates
+    points = coordinates[np.asarray(sequence, dtype=np.int64)]
+    axes.add_collection(LineCollection(np.stack([points[:-1], points[1:]], axis=1), colors='b',
+                                       linewidths=1 if graph.N <= LABELLED_VERTICES else 0.5))
+    step = -(-graph.N // PLOTTED_VERTICES)
+    axes.plot(coordinates[::step, 0], coordinates[::step, 1], 'bo', markersize=4 if graph.N <= LABELLED_VERTICES else 1)
+    if graph.N <= LABELLED_VERTICES:
+        for i, (x, y) in enumerate(coordinates.tolist()):
+            axes.text(x, y, i)
+    axes.autoscale_view()
+    axes.set_title(title)
+
+
+def plot_graph(graph, sequence: list, title: str, path=None):
     """
     plot hamiltonian circuit
     :param graph: class graph
     :param sequence: sequence of vertices that form a hamiltonian circuit
     :param title: title of the graph
+    :param path: file where the plot is saved (png, svg, ...), the plot is shown in a window if None
     :return:
     """
-    x_coords = [graph.vertices[i].x for i in range(graph.N)]
-    y_coords = [graph.vertices[i].y for i in range(graph.N)]
-    for i in range(graph.N):
-        plt.text(x_coords[i], y_coords[i], i)
-    for index in range(len(sequence) - 1):
-        plt.plot([graph.vertices[sequence[index]].x, graph.vertices[sequence[index + 1]].x],
-                 [graph.vertices[sequence[index]].y, graph.vertices[sequence[index + 1]].y], 'bo-')
-    step = MAX_WIDTH // 10
-    plt.xticks([i for i in range(0, MAX_WIDTH + 1, step)])
-    plt.yticks([i for i in range(0, MAX_HEIGHT + 1, step)])
-    plt.title(title)
-    plt.show()
\ No newline at end of file
+    show_or_save(lambda axes: draw_tour(axes, graph, sequence, title), path)
+
+
+def plot_bars(labels: list, values: list, ylabel: str, title: str, path=None):
+    """
+    plot values as a bar graph
+    :param labels: labels of the bars
+    :param values: heights of the bars
+    :param ylabel: label of the y axis
+    :param title: title of the graph
+    :param path: file where the plot is saved (png, svg, ...), the plot is shown in a window if None
+    """
+    def draw(axes):
+        axes.bar(labels, values, color='maroon', width=0.4)
+        axes.set_xlabel("Algorithms")
+        axes.set_ylabel(ylabel)
+        axes.set_title(title)
+
+    show_or_save(draw, path)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import optparse
+import os
+
+import numpy as np
+
+from vertex import Graph
+from profiler import NULL_PROFILER
+
+# number of bytes of a text file that are parsed at once
+CHUNK_SIZE = 1 << 22
+# lookup table of bytes that are not separators of coordinates in text files
+IS_VALUE = np.ones(256, dtype=bool)
+IS_VALUE[np.frombuffer(b' \t\r\n\v\f,', dtype=np.uint8)] = False
+
+
+def parse_chunk(data: bytes, first_line=1):
+    """
+    parse coordinates separated by a comma or whitespace, every non-empty line contains one vertex
+    :param data: whole lines of a text file
+    :param first_line: number of the first line, used in error messages
+    :return: array of coordinates with shape (n, 2)
+    """
+    characters = np.frombuffer(data, dtype=np.uint8)
+    line_of = np.cumsum(characters == ord('\n'), dtype=np.uint32)
+    is_value = IS_VALUE[characters]
+    starts_value = is_value.copy()
+    starts_value[1:] &= ~is_value[:-1]
+    values_per_line = np.bincount(line_of[starts_value])
+    try:
+        values = np.fromstring(data.replace(b',', b' ').decode(), sep=' ')
+    except ValueError:
+        values = None
+
+    if values is None or np.any((values_per_line != 0) & (values_per_line != 2)):
+        for number, line in enumerate(data.decode().splitlines(), first_line):
+            fields = line.replace(',', ' ').split()
+            if fields and len(fields) != 2:
+                raise ValueError(f'line {number}: expected two coordinates, got {line.strip()!r}')
+            try:
+                [float(field) for field in fields]
+            except ValueError:
+                raise ValueError(f'line {number}: invalid coordinates {line.strip()!r}') from None
+        raise ValueError(f'invalid coordinates in lines starting at line {first_line}')
+    return values.reshape(-1, 2)
+
+
+def load_text(path: str, chunk_size=CHUNK_SIZE):
+    """
+    load coordinates from a text file with one vertex per line in a format: x, y,
+    the file is parsed in chunks of whole lines so huge files do not need a copy of all their text in memory
+    :param path: path to the file
+    :param chunk_size: approximate number of bytes parsed at once
+    :return: array of coordinates with shape (N, 2)
+    """
+    chunks = []
+    first_line = 1
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            data += f.readline()
+            chunks.append(parse_chunk(data, first_line))
+            first_line += data.count(b'\n')
+
+    return np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.float64)
+
+
+def load_tsplib(path: str):
+    """
+    load coordinates from a TSPLIB file with EUC_2D edge weights, vertices are ordered by their
+    numbers in NODE_COORD_SECTION, distances are not rounded to integers as TSPLIB defines
+    :param path: path to the .tsp file
+    :return: array of coordinates with shape (N, 2)
+    """
+    header = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('NODE_COORD_SECTION'):
+                break
+            if ':' in line:
+                key, value = line.split(':', 1)
+                header[key.strip().upper()] = value.strip()
+        else:
+            raise ValueError(f'{path}: missing NODE_COORD_SECTION')
+        text = f.read()
+
+    if header.get('EDGE_WEIGHT_TYPE', 'EUC_2D').upper() != 'EUC_2D':
+        raise ValueError(f"{path}: unsupported EDGE_WEIGHT_TYPE {header['EDGE_WEIGHT_TYPE']}, only EUC_2D is supported")
+    end = text.find('EOF')
+    values = np.array(text[:end if end >= 0 else len(text)].split(), dtype=np.float64)
+    if len(values) % 3:
+        raise ValueError(f'{path}: every line of NODE_COORD_SECTION must contain a number and two coordinates')
+    nodes = values.reshape(-1, 3)
+    nodes = nodes[np.argsort(nodes[:, 0], kind='stable')]
+    if 'DIMENSION' in header and int(header['DIMENSION']) != len(nodes):
+        raise ValueError(f"{path}: DIMENSION is {header['DIMENSION']} but {len(nodes)} vertices were found")
+
+    return np.ascontiguousarray(nodes[:, 1:])
+
+
+def save_binary(path: str, coordinates):
+    """
+    save coordinates in a binary .npy file that can be memory-mapped by load_binary
+    :param path: path to the file
+    :param coordinates: array of coordinates with shape (N, 2)
+    """
+    np.save(path, np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+
+
+def load_binary(path: str):
+    """
+    :param path: path to a .npy file created by save_binary
+    :return: read-only memory-mapped array of coordinates with shape (N, 2)
+    """
+    coordinates = np.load(path, mmap_mode='r')
+    if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+        raise ValueError(f'{path}: expected array with shape (N, 2), got {coordinates.shape}')
+    return coordinates
+
+
+def load_coordinates(path: str):
+    """
+    load coordinates from a file, the format is chosen by the extension: .tsp for TSPLIB, .npy for binary
+    and text with one vertex per line otherwise
+    :param path: path to the file
+    :return: array of coordinates with shape (N, 2)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.tsp':
+        return load_tsplib(path)
+    if extension == '.npy':
+        return load_binary(path)
+    return load_text(path)
+
+
+def load_graph(path: str, dtype=np.float64, matrix_free=False, profiler=None):
+    """
+    :param path: path to a file in any format supported by load_coordinates
+    :param dtype: type of stored distances
+    :param matrix_free: compute distances on demand instead of storing the distance matrix
+    :param profiler: optional Profiler that measures loading and construction of the graph
+    :return: class Graph
+    """
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('load'):
+        coordinates = load_coordinates(path)
+    return Graph(len(coordinates), dtype=dtype, matrix_free=matrix_free, coordinates=coordinates, profiler=profiler)
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(usage='%prog input output.npy')
+    parser.description = 'Convert a text or TSPLIB file to the binary format that loads without parsing'
+    options, args = parser.parse_args()
+    if len(args) != 2:
+        parser.print_help()
+        quit()
+
+    save_binary(args[1], load_coordinates(args[0]))
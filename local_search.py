@@ -0,0 +1,231 @@
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from spatial_index import k_nearest_neighbours
+from tour import Tour
+
+# number of nearest neighbours of every vertex that are tried as new neighbours in the tour
+LOCAL_SEARCH_NEIGHBOURS = 8
+# longest segment of vertices that is moved by or-opt
+OR_OPT_SEGMENT_LENGTH = 3
+# smallest improvement of the tour length that is accepted
+EPSILON = 1e-9
+
+
+class LocalSearch(Tour):
+    """
+    2-opt and or-opt improvement of a hamiltonian circuit, only moves that connect a vertex with one
+    of its nearest neighbours are tried and vertices whose surroundings did not change are not checked again
+    (don't look bits), the tour with positions of vertices and its length is kept by Tour
+    """
+    def __init__(self, graph, sequence: list, k=LOCAL_SEARCH_NEIGHBOURS):
+        """
+        :param graph: class Graph
+        :param sequence: sequence of vertices that form a hamiltonian circuit (starting vertex at the end)
+        :param k: number of nearest neighbours of every vertex
+        """
+        self.coordinates = graph.coordinates
+        self.xs = graph.coordinates[:, 0].tolist()
+        self.ys = graph.coordinates[:, 1].tolist()
+        super().__init__(graph.adjacency_matrix, sequence)
+        vertices, neighbours = k_nearest_neighbours(graph.coordinates, k)
+        self.neighbours = neighbours.tolist()
+        self.active = [True] * self.N
+        self.queue = deque(self.order)
+        self.moves = 0
+        # reversals since the last checkpoint as pairs of positions, None if they are not recorded
+        self.journal = None
+
+    def distance(self, first: int, second: int):
+        return math.sqrt((self.xs[first] - self.xs[second]) ** 2 + (self.ys[first] - self.ys[second]) ** 2)
+
+    def activate(self, *vertices):
+        """
+        clear don't look bits of vertices whose edges changed
+        """
+        for vertex in vertices:
+            if not self.active[vertex]:
+                self.active[vertex] = True
+                self.queue.append(vertex)
+
+    def reverse(self, first: int, last: int):
+        super().reverse(first, last)
+        if self.journal is not None:
+            self.journal.append((first, last))
+
+    def checkpoint(self):
+        """
+        start recording reversals so that the tour can be restored by rollback
+        """
+        self.journal = []
+
+    def rollback(self):
+        """
+        restore the tour of the last checkpoint by undoing the recorded reversals in reverse order, in time
+        proportional to the length of the reversed parts instead of O(N) of set_tour, all don't look bits are set
+        """
+        journal, self.journal = self.journal, None
+        for first, last in reversed(journal):
+            super().reverse(first, last)
+        for vertex in self.queue:
+            self.active[vertex] = False
+        self.queue.clear()
+
+    def exchange(self, first: int, first_next: int, second: int, second_next: int):
+        """
+        2-opt move, replace edges (first, first_next) and (second, second_next) by edges (first, second)
+        and (first_next, second_next), both removed edges must have the same direction in the tour,
+        the shorter of the two paths between removed edges is reversed
+        """
+        if self.successor(first) != first_next:
+            first, first_next, second, second_next = second_next, second, first_next, first
+        self.two_opt(first, second)
+        self.moves += 1
+        self.activate(first, first_next, second, second_next)
+
+    def try_two_opt(self, vertex: int):
+        """
+        try to replace an edge of vertex and another edge by an edge from vertex to one of its neighbours
+        :return: True if the tour was improved
+        """
+        for step in (self.successor, self.predecessor):
+            other = step(vertex)
+            removed = self.distance(vertex, other)
+            for neighbour in self.neighbours[vertex]:
+                added = self.distance(vertex, neighbour)
+                if added >= removed:
+                    break
+                neighbour_other = step(neighbour)
+                if neighbour == other or neighbour_other == vertex:
+                    continue
+                delta = added + self.distance(other, neighbour_other) - removed - \
+                    self.distance(neighbour, neighbour_other)
+                if delta < -EPSILON:
+                    if step == self.successor:
+                        self.exchange(vertex, other, neighbour, neighbour_other)
+                    else:
+                        self.exchange(other, vertex, neighbour_other, neighbour)
+                    return True
+        return False
+
+    def try_or_opt(self, vertex: int):
+        """
+        try to move a segment of up to OR_OPT_SEGMENT_LENGTH vertices starting at vertex next to a neighbour
+        of one of its ends, the segment may be reversed
+        :return: True if the tour was improved
+        """
+        for length in range(1, min(OR_OPT_SEGMENT_LENGTH, self.N - 3) + 1):
+            start = self.position.item(vertex)
+            segment = [self.order[(start + offset) % self.N] for offset in range(length)]
+            segment_first, segment_last = segment[0], segment[-1]
+            previous, following = self.predecessor(segment_first), self.successor(segment_last)
+            removal_gain = self.distance(previous, segment_first) + self.distance(segment_last, following) - \
+                self.distance(previous, following)
+            if removal_gain <= EPSILON:
+                continue
+
+            for end in (segment_first, segment_last):
+                for neighbour in self.neighbours[end]:
+                    if self.distance(end, neighbour) >= removal_gain:
+                        break
+                    if neighbour in segment:
+                        continue
+                    for first, second in ((neighbour, self.successor(neighbour)),
+                                          (self.predecessor(neighbour), neighbour)):
+                        if first in segment or second in segment or first == following or second == previous:
+                            continue
+                        removed = self.distance(first, second)
+                        forward = self.distance(first, segment_first) + self.distance(segment_last, second)
+                        backward = self.distance(first, segment_last) + self.distance(segment_first, second)
+                        if min(forward, backward) - removed < removal_gain - EPSILON:
+                            self.move_segment(previous, segment_first, segment_last, following, first, second,
+                                              forward <= backward)
+                            return True
+        return False
+
+    def move_segment(self, previous, segment_first, segment_last, following, first, second, keep_direction):
+        """
+        or-opt move of segment between previous and following to edge (first, second) as a sequence of 2-opt moves,
+        (first, second) must have the same direction as the segment
+        """
+        self.exchange(previous, segment_first, first, second)
+        self.exchange(previous, first, following, segment_last)
+        if keep_direction:
+            self.exchange(first, segment_last, segment_first, second)
+        self.activate(previous, following, first, second)
+
+    def double_bridge(self, start: int, first_length: int, second_length: int):
+        """
+        perturb the tour by swapping two consecutive segments after position start,
+        the move cannot be undone by 2-opt or or-opt moves of the local search
+        :param start: position of the vertex before the first segment
+        :param first_length: length of the first segment
+        :param second_length: length of the second segment
+        """
+        first, last = (start + 1) % self.N, (start + first_length + second_length) % self.N
+        ends = [self.order[position % self.N] for position in
+                (start, start + 1, start + first_length, start + first_length + 1, start + first_length + second_length,
+                 start + first_length + second_length + 1)]
+        self.reverse(first, last)
+        self.reverse(first, (start + second_length) % self.N)
+        self.reverse((start + second_length + 1) % self.N, last)
+        self.activate(*ends)
+
+    def set_tour(self, sequence: list):
+        """
+        replace current tour, all don't look bits are set because the new tour is expected to be a local optimum
+        :param sequence: sequence of vertices that form a hamiltonian circuit (starting vertex at the end)
+        """
+        self.order = [int(vertex) for vertex in sequence[:-1]]
+        self.position[self.order] = np.arange(self.N)
+        self.length = self.compute_length()
+        self.active = [False] * self.N
+        self.queue.clear()
+        self.journal = None
+
+    def compute_length(self):
+        """
+        :return: length of the tour computed from coordinates, consistent with distances used by the moves
+        """
+        points = self.coordinates[self.order]
+        return float(np.sqrt(((points - np.roll(points, -1, axis=0)) ** 2).sum(axis=1)).sum())
+
+    def run(self, or_opt=True, deadline=None):
+        """
+        apply improving moves until no vertex can be improved or until the deadline
+        :param or_opt: try also or-opt moves, otherwise only 2-opt
+        :param deadline: value of time.perf_counter() when the search stops, vertices that were not checked
+        yet stay in the queue
+        :return: improved sequence of vertices that form a hamiltonian circuit
+        """
+        if self.N >= 4:
+            checked = 0
+            while self.queue:
+                checked += 1
+                if deadline is not None and checked % 256 == 0 and time.perf_counter() > deadline:
+                    break
+                vertex = self.queue.popleft()
+                self.active[vertex] = False
+                if self.try_two_opt(vertex) or (or_opt and self.try_or_opt(vertex)):
+                    self.activate(vertex)
+
+        return self.sequence()
+
+
+def improve_tour(graph, sequence: list, k=LOCAL_SEARCH_NEIGHBOURS, or_opt=True, deadline=None):
+    """
+    improve hamiltonian circuit created by any of the algorithms using 2-opt and or-opt local search
+    :param graph: class Graph
+    :param sequence: sequence of vertices that form a hamiltonian circuit (starting vertex at the end) or Tour
+    :param k: number of nearest neighbours of every vertex that are tried
+    :param or_opt: use also or-opt moves
+    :param deadline: value of time.perf_counter() when the improvement stops
+    :return: improved sequence of vertices, or Tour if sequence is a Tour
+    """
+    improved = LocalSearch(graph, sequence, k).run(or_opt, deadline)
+    if isinstance(sequence, Tour):
+        return Tour(sequence.adjacency_matrix, improved)
+    return improved
@@ -0,0 +1,192 @@
+import time
+
+import numpy as np
+
+from christofides import dense_prims, candidate_kruskal
+from profiler import NULL_PROFILER
+from space_filling_curve import hilbert_curve
+from spatial_index import candidate_edges
+from helper_functions import calculate_distance
+
+# number of nearest neighbours of every vertex whose edges form the sparse graph of the subgradient ascent
+BOUND_NEIGHBOURS = 10
+# largest number of iterations of the subgradient ascent
+BOUND_ITERATIONS = 100
+# number of iterations without improvement of the bound after which the step is halved
+BOUND_PATIENCE = 5
+
+
+class PenalizedDistances:
+    """
+    distances modified by penalties of vertices, d(i, j) + penalty(i) + penalty(j), between all vertices except
+    the last one, which is the special vertex of 1-trees, it has the interface of an adjacency matrix used by
+    dense_prims
+    """
+    def __init__(self, adjacency_matrix, penalties):
+        self.adjacency_matrix = adjacency_matrix
+        self.penalties = penalties
+        self.N = len(adjacency_matrix) - 1
+        self.xs = np.ascontiguousarray(adjacency_matrix.coordinates[:, 0], dtype=np.float64)
+        self.ys = np.ascontiguousarray(adjacency_matrix.coordinates[:, 1], dtype=np.float64)
+
+    def __len__(self):
+        return self.N
+
+    def distances_from(self, i: int):
+        """
+        :return: array of modified distances from vertex i, computed from coordinates which is faster
+        than gathering them from a condensed matrix
+        """
+        xs, ys = self.xs[:self.N], self.ys[:self.N]
+        lengths = xs - xs[i]
+        np.multiply(lengths, lengths, out=lengths)
+        difference = ys - ys[i]
+        np.multiply(difference, difference, out=difference)
+        lengths += difference
+        np.sqrt(lengths, out=lengths)
+        lengths += self.penalties[:self.N]
+        lengths += self.penalties[i]
+        return lengths
+
+
+def one_tree(adjacency_matrix, penalties):
+    """
+    minimum 1-tree of distances modified by penalties: MST of all vertices except the last one and two shortest
+    edges of the last vertex, computed exactly by dense prims algorithm in O(N^2) time and O(N) memory
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param penalties: array of penalties of vertices
+    :return: modified length of the 1-tree and array of degrees of vertices in it
+    """
+    number_of_vertices = len(adjacency_matrix)
+    modified = PenalizedDistances(adjacency_matrix, penalties)
+    tree = np.array(dense_prims(modified), dtype=np.int64).reshape(-1, 2)
+    points = adjacency_matrix.coordinates
+    length = float(np.hypot(*(points[tree[:, 0]] - points[tree[:, 1]]).T).sum() + penalties[tree].sum())
+
+    special = number_of_vertices - 1
+    lengths = np.hypot(*(points - points[special]).T) + penalties + penalties[special]
+    lengths[special] = np.inf
+    closest = np.argpartition(lengths, 1)[:2]
+    length += float(lengths[closest].sum())
+    degrees = np.bincount(np.concatenate([tree.ravel(), closest, [special, special]]), minlength=number_of_vertices)
+    return length, degrees
+
+
+def sparse_one_tree(number_of_vertices: int, first, second, lengths, penalties):
+    """
+    approximate minimum 1-tree of distances modified by penalties on a sparse graph of candidate edges,
+    the spanning tree is found by boruvkas algorithm where every round connects every component
+    to its closest component by array operations, the special vertex is the last one
+    :param number_of_vertices: number of vertices
+    :param first: array of first vertices of edges
+    :param second: array of second vertices of edges
+    :param lengths: array of lengths of edges
+    :param penalties: array of penalties of vertices
+    :return: modified length of the 1-tree and array of degrees of vertices in it
+    """
+    special = number_of_vertices - 1
+    modified = lengths + penalties[first] + penalties[second]
+    order = np.argsort(modified)
+    at_special = (first[order] == special) | (second[order] == special)
+    # edges sorted by modified length, position in the order breaks ties so the lightest edges form a forest
+    edges = order[~at_special]
+    ranks = np.arange(len(edges))
+    ends = np.stack([first[edges], second[edges]])
+    labels = np.arange(number_of_vertices)
+    tree = [order[at_special][:2]]
+    while True:
+        components = labels[ends]
+        crossing = components[0] != components[1]
+        if not crossing.any():
+            break
+        ends, ranks, components = ends[:, crossing], ranks[crossing], components[:, crossing]
+        lightest = np.full(number_of_vertices, len(edges))
+        np.minimum.at(lightest, components[0], ranks)
+        np.minimum.at(lightest, components[1], ranks)
+        hooked = np.flatnonzero(lightest < len(edges))
+        chosen = np.zeros(len(edges), dtype=bool)
+        chosen[lightest[hooked]] = True
+        tree.append(edges[chosen])
+
+        # every component points to the other end of its lightest edge, pairs that chose the same edge
+        # are resolved to the smaller component, then pointers are followed to the roots
+        position = np.searchsorted(ranks, lightest[hooked])
+        other = np.where(components[0, position] == hooked, components[1, position], components[0, position])
+        parent = np.arange(number_of_vertices)
+        parent[hooked] = other
+        mutual = parent[parent] == np.arange(number_of_vertices)
+        parent[mutual] = np.minimum(parent[mutual], np.arange(number_of_vertices)[mutual])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        labels = parent[labels]
+
+    tree = np.concatenate(tree)
+    degrees = np.bincount(np.concatenate([first[tree], second[tree]]), minlength=number_of_vertices)
+    return float(modified[tree].sum()), degrees
+
+
+def held_karp_bound(graph, upper_bound=None, iterations=None, deadline=None, profiler=None):
+    """
+    held-karp lower bound of the length of the optimal tour, subgradient ascent looks for penalties of vertices
+    that maximize the length of the minimum 1-tree minus twice the sum of the penalties, the ascent uses 1-trees
+    on a sparse graph of nearest neighbour edges and the best penalties are evaluated by the exact 1-tree,
+    so the bound is valid
+    :param graph: class Graph
+    :param upper_bound: length of any tour, it sets the step of the ascent, length of the hilbert curve tour if None
+    :param iterations: largest number of iterations of the ascent, BOUND_ITERATIONS if None
+    :param deadline: value of time.perf_counter() when the ascent stops
+    :param profiler: optional Profiler that measures phases of the computation
+    :return: lower bound of the length of the optimal tour and array of penalties of vertices
+    """
+    profiler = profiler or NULL_PROFILER
+    iterations = iterations or BOUND_ITERATIONS
+    number_of_vertices = graph.N
+    penalties = np.zeros(number_of_vertices, dtype=np.float64)
+    if number_of_vertices < 3:
+        return 2 * float(graph.adjacency_matrix.distances([0], [number_of_vertices - 1])[0]), penalties
+
+    with profiler.phase('lower_bound'):
+        with profiler.phase('candidates'):
+            if upper_bound is None:
+                upper_bound = calculate_distance(graph.adjacency_matrix, hilbert_curve(graph))
+            first, second, lengths = candidate_edges(graph.adjacency_matrix,
+                                                     min(BOUND_NEIGHBOURS, number_of_vertices - 1))
+            # edges of spanning tree keep the sparse graph connected
+            tree = np.sort(np.array(candidate_kruskal(graph.adjacency_matrix), dtype=np.int64), axis=1)
+            first = np.concatenate([first, tree[:, 0]])
+            second = np.concatenate([second, tree[:, 1]])
+            lengths = np.concatenate([lengths, graph.adjacency_matrix.distances(tree[:, 0], tree[:, 1])])
+
+        with profiler.phase('ascent'):
+            best_bound, best_penalties = -np.inf, penalties
+            step_scale, without_improvement = 2.0, 0
+            for _ in range(iterations):
+                length, degrees = sparse_one_tree(number_of_vertices, first, second, lengths, penalties)
+                profiler.count('iterations')
+                bound = length - 2 * penalties.sum()
+                if bound > best_bound + 1e-9:
+                    best_bound, best_penalties, without_improvement = bound, penalties.copy(), 0
+                else:
+                    without_improvement += 1
+                    if without_improvement >= BOUND_PATIENCE:
+                        step_scale, without_improvement = step_scale / 2, 0
+                subgradient = degrees - 2
+                norm = float(subgradient @ subgradient)
+                if norm == 0 or step_scale < 1e-4 or (deadline is not None and time.perf_counter() > deadline):
+                    break
+                penalties = penalties + step_scale * max(upper_bound - bound, 0.0) / norm * subgradient
+
+        with profiler.phase('exact_one_tree'):
+            length, degrees = one_tree(graph.adjacency_matrix, best_penalties)
+
+    return length - 2 * float(best_penalties.sum()), best_penalties
+
+
+def optimality_gap(distance: float, bound: float):
+    """
+    :return: relative gap between the distance of a tour and a lower bound, 0.05 means at most 5 % above optimum
+    """
+    return (distance - bound) / bound if bound > 0 else 0.0
@@ -1,96 +1,288 @@
 #!/usr/bin/env python3
 
-import matplotlib.pyplot as plt
 import time
-import sys
-import optparse
 
-from nearest_neighbour import nearest_neighbour
-from cheapest_link import cheapest_link
-from christofides import christofides
-from vertex import Graph, Vertex
-from helper_functions import return_path_from_sequence_pairs, calculate_distance, plot_graph
+# time when the script started, startup time reported in the output is measured from it, it is taken before
+# the remaining imports so that their time is included (hence noqa: E402 below)
+START_TIME = time.perf_counter()
 
+import json  # noqa: E402
+import os  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
+import optparse  # noqa: E402
 
-if __name__ == "__main__":
-    parser = optparse.OptionParser()
+from vertex import Graph  # noqa: E402
+from helper_functions import calculate_distance  # noqa: E402
+from profiler import Profiler, NULL_PROFILER  # noqa: E402
+
+# algorithms that can be selected by --algorithms
+ALGORITHMS = ['nearest_neighbour', 'cheapest_link', 'christofides', 'hilbert_curve']
+# algorithms that run when none are selected
+DEFAULT_ALGORITHMS = ['nearest_neighbour', 'cheapest_link', 'christofides']
+# titles of algorithms in plots and text output
+TITLES = {'nearest_neighbour': 'Nearest neighbour', 'cheapest_link': 'Cheapest-link', 'christofides': 'Christofides',
+          'hilbert_curve': 'Hilbert curve', 'portfolio': 'Portfolio', 'partition': 'Partition', 'anytime': 'Anytime'}
+
+
+def elapsed_ms(start_time: float):
+    return (time.perf_counter() - start_time) * 1000
+
+
+def run_algorithm(graph, algorithm: str, matching='greedy', profiler=NULL_PROFILER):
+    """
+    run one algorithm, modules of algorithms are imported only when they are used
+    :param graph: class Graph
+    :param algorithm: name of the algorithm from ALGORITHMS
+    :param matching: pairing of odd vertices in christofides algorithm: greedy or blossom
+    :param profiler: Profiler that measures phases of the algorithm
+    :return: sequence of vertices that form a hamiltonian circuit and dictionary of additional timings in ms
+    """
+    timings = {}
+    if algorithm == 'nearest_neighbour':
+        from nearest_neighbour import nearest_neighbour
+        sequence = nearest_neighbour(graph, profiler=profiler)
+    elif algorithm == 'cheapest_link':
+        from cheapest_link import cheapest_link
+        from helper_functions import return_path_from_sequence_pairs
+        pairs = cheapest_link(graph, profiler=profiler)
+        with profiler.phase('path_from_pairs'):
+            sequence = return_path_from_sequence_pairs(pairs)
+    elif algorithm == 'christofides':
+        from christofides import christofides
+        sequence = christofides(graph, matching, timings, profiler)
+    elif algorithm == 'hilbert_curve':
+        from space_filling_curve import hilbert_curve
+        sequence = hilbert_curve(graph, profiler=profiler)
+    else:
+        raise ValueError(f'unknown algorithm: {algorithm}')
+    return sequence, timings
+
+
+def improve(graph, result: dict, profiler=NULL_PROFILER):
+    """
+    improve the tour of a result by local search, the result gets the improved tour, its distance and time
+    :param graph: class Graph
+    :param result: dictionary with 'tour' and 'distance' of a hamiltonian circuit
+    :param profiler: Profiler that measures the local search
+    """
+    from local_search import improve_tour
+    start_time = time.perf_counter()
+    with profiler.phase('local_search'):
+        result['tour'] = improve_tour(graph, result['tour'])
+    result['improve_time'] = elapsed_ms(start_time)
+    result['construction_distance'] = result['distance']
+    result['distance'] = calculate_distance(graph.adjacency_matrix, result['tour'])
+
+
+def plot_path(directory, name: str, extension: str):
+    """
+    :param directory: directory where plots are saved, None if plots are shown in a window
+    :param name: name of the plot
+    :param extension: format of the saved plot, e.g. png or svg
+    :return: path of the saved plot or None
+    """
+    if directory is None:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{name}.{extension}')
+
+
+def print_text(output: dict):
+    """
+    print results in a human readable format
+    """
+    graph = output['graph']
+    print(f"Graph: {graph['vertices']} vertices in {graph['time']:.1f} ms, startup {output['startup']:.1f} ms")
+    if 'lower_bound' in output:
+        print(f"Lower bound: {output['lower_bound']['distance']:.2f} in {output['lower_bound']['time']:.1f} ms")
+    for result in output['results']:
+        line = f"{TITLES[result['algorithm']]}: {result['distance']:.2f} in {result['time']:.1f} ms"
+        if 'cells' in result:
+            line += f", {result['cells']} cells"
+        if 'gap' in result:
+            line += f", gap {result['gap'] * 100:.2f} %"
+        if 'improve_time' in result:
+            line += f" (improved from {result['construction_distance']:.2f} in {result['improve_time']:.1f} ms)"
+        print(line)
+        for name, values in result.get('statistics', {}).items():
+            if isinstance(values, dict):
+                print(f"  {name}: {values['runs']} runs, best {values['best']:.2f}, mean {values['mean']:.2f}, "
+                      f"worst {values['worst']:.2f}, {values['time']:.1f} ms per run")
+        if result.get('timings'):
+            print('  ' + ', '.join(f'{name} {value:.1f} ms' for name, value in result['timings'].items()))
+    if 'best_known' in output:
+        print(f"Best known tour: {output['best_known']:.2f}")
+    if 'profile' in output:
+        print(json.dumps(output['profile'], indent=2))
+
+
+def parse_options(argv=None):
+    parser = optparse.OptionParser(usage='%prog (--file FILE | --random N) [options]')
     parser.add_option('--file', dest='file',
-                      help='File that contains coordinates of the vertices')
-    parser.add_option('--random', dest='random',
+                      help='File that contains coordinates of the vertices: text, TSPLIB .tsp or binary .npy')
+    parser.add_option('--random', dest='random', type='int',
                       help='Number of vertices that should be generated')
+    parser.add_option('--algorithms', dest='algorithms', default=','.join(DEFAULT_ALGORITHMS),
+                      help='Comma separated algorithms: ' + ', '.join(ALGORITHMS) + ' [default: %default]')
+    parser.add_option('--seed', dest='seed', type='int',
+                      help='Seed of generated vertices, random choices of algorithms, portfolio runs and partition '
+                           'cells, random if not given')
+    parser.add_option('--matrix-free', dest='matrix_free', action='store_true', default=False,
+                      help='Compute distances on demand instead of storing the distance matrix')
+    parser.add_option('--matching', dest='matching', type='choice', choices=['greedy', 'blossom'], default='greedy',
+                      help='Pairing of odd vertices in Christofides: greedy or blossom')
+    parser.add_option('--improve', dest='improve', action='store_true', default=False,
+                      help='Improve every tour by 2-opt and or-opt local search')
+    parser.add_option('--json', dest='json', action='store_true', default=False,
+                      help='Print tours, distances and timings as one JSON document')
+    parser.add_option('--no-tours', dest='tours', action='store_false', default=True,
+                      help='Leave tours out of the JSON output')
+    parser.add_option('--no-plot', dest='plot', action='store_false', default=True,
+                      help='Do not plot tours, matplotlib is not imported at all')
+    parser.add_option('--save-plots', dest='save_plots',
+                      help='Directory where plots are saved instead of being shown, no display is needed')
+    parser.add_option('--plot-format', dest='plot_format', default='png',
+                      help='Format of saved plots: png, svg, pdf, ...')
+    parser.add_option('--profile', dest='profile', action='store_true', default=False,
+                      help='Include time, calls and counters of every phase of the algorithms in the output')
+    parser.add_option('--profile-memory', dest='profile_memory', action='store_true', default=False,
+                      help='Include peak memory of every phase in the profile, slows down the algorithms')
+    parser.add_option('--portfolio', dest='portfolio', type='int',
+                      help='Run every algorithm from this many seeded starts in parallel and keep the best tour')
+    parser.add_option('--partition', dest='partition', type='int',
+                      help='Split the plane into cells of at most this many vertices, solve them in parallel '
+                           'and stitch their tours together')
+    parser.add_option('--partition-algorithm', dest='partition_algorithm', default='nearest_neighbour',
+                      help='Algorithm that solves cells of the partition: nearest_neighbour or christofides')
+    parser.add_option('--anytime', dest='anytime', type='float',
+                      help='Improve tours by iterated local search for this many seconds and keep the best one')
+    parser.add_option('--bound', dest='bound', action='store_true', default=False,
+                      help='Compute held-karp lower bound and report optimality gap of every tour')
+    parser.add_option('--target-gap', dest='target_gap', type='float',
+                      help='Optimality gap (e.g. 0.05) that is good enough, tours within it are not improved '
+                           'and the anytime search stops when it is reached, implies --bound')
+    parser.add_option('--cache', dest='cache',
+                      help='Directory of a cache of distance matrices and best known tours of instances')
 
-    options, args = parser.parse_args()
+    options, args = parser.parse_args(argv)
+    options.algorithms = [name.strip() for name in options.algorithms.split(',') if name.strip()]
+    unknown = [name for name in options.algorithms if name not in ALGORITHMS]
+    if args or unknown or not (options.file or options.random):
+        if unknown:
+            print(f"unknown algorithms: {', '.join(unknown)}", file=sys.stderr)
+        parser.print_help(sys.stderr)
+        sys.exit(2)
+    return options
 
-    try:
-        sys.argv[1]
-    except IndexError:  # no arguments give, print --help
-        parser.print_help()
-        quit()
 
+def main(argv=None):
+    options = parse_options(argv)
+    output = {'startup': elapsed_ms(START_TIME)}
+
+    if options.profile or options.profile_memory:
+        profiler = Profiler(options.profile_memory)
+    else:
+        profiler = NULL_PROFILER
+    cache = None
+    if options.cache:
+        from cache import DiskCache
+        cache = DiskCache(options.cache)
+
+    start_time = time.perf_counter()
+    if options.seed is not None:
+        random.seed(options.seed)
     if options.file:
-        file = options.file
-        vertices = []
-        with open(file, 'r') as f:
-            for index, line in enumerate(f):
-                x, y = line.split(', ')
-                vertices.append(Vertex(index, int(x), int(y)))
-        graph = Graph(len(vertices), vertices)
+        from loader import load_coordinates
+        with profiler.phase('load'):
+            coordinates = load_coordinates(options.file)
+        if cache:
+            from cache import cached_graph
+            graph = cached_graph(cache, coordinates, matrix_free=options.matrix_free, profiler=profiler)
+        else:
+            graph = Graph(len(coordinates), matrix_free=options.matrix_free, coordinates=coordinates,
+                          profiler=profiler)
+    else:
+        graph = Graph(options.random, matrix_free=options.matrix_free, profiler=profiler)
+    output['graph'] = {'vertices': graph.N, 'time': elapsed_ms(start_time), 'seed': options.seed}
 
-    elif options.random:
-        graph = Graph(int(options.random))
+    bound, target = None, None
+    if options.bound or options.target_gap is not None:
+        from lower_bound import held_karp_bound, optimality_gap
+        start_time = time.perf_counter()
+        bound = held_karp_bound(graph, profiler=profiler)[0]
+        output['lower_bound'] = {'distance': bound, 'time': elapsed_ms(start_time)}
+        if options.target_gap is not None:
+            target = bound * (1 + options.target_gap)
 
+    results = []
+    if options.anytime is not None:
+        from anytime import solve_anytime
+        # the search continues from the best known tour of previous runs
+        best_known = cache.load_tour(graph.coordinates) if cache else None
+        initial = best_known[0] if best_known else None
+        start_time = time.perf_counter()
+        sequence, distance, timeline = solve_anytime(graph, options.anytime, options.seed, initial=initial,
+                                                     target=target)
+        results.append({'algorithm': 'anytime', 'distance': distance, 'time': elapsed_ms(start_time),
+                        'tour': sequence, 'timeline': timeline})
+    elif options.portfolio:
+        from portfolio import solve_portfolio
+        start_time = time.perf_counter()
+        sequence, distance, algorithm, statistics = solve_portfolio(graph, options.portfolio, options.seed)
+        results.append({'algorithm': 'portfolio', 'distance': distance, 'time': elapsed_ms(start_time),
+                        'tour': sequence, 'statistics': dict(statistics, best_algorithm=algorithm)})
+    elif options.partition:
+        from partition import solve_partitioned
+        start_time = time.perf_counter()
+        sequence, distance, statistics = solve_partitioned(graph, options.partition_algorithm, options.partition,
+                                                           options.seed)
+        cell_times = [elapsed for vertices, elapsed in statistics.pop('cells')]
+        timings = dict(statistics, cell_mean=sum(cell_times) / len(cell_times), cell_max=max(cell_times))
+        results.append({'algorithm': 'partition', 'distance': distance, 'time': elapsed_ms(start_time),
+                        'tour': sequence, 'cells': len(cell_times), 'timings': timings})
     else:
-        parser.print_help()
-        quit()
-
-    times = []
-    distances = []
-
-    # Nearest neighbour
-    start_time1 = time.perf_counter()
-
-    seq_nn = nearest_neighbour(graph)
-    distances.append(calculate_distance(graph.adjacency_matrix, seq_nn))
-    time_nn = (time.perf_counter() - start_time1) * 1000
-    times.append(time_nn)
-
-    plot_graph(graph, seq_nn, 'Nearest neighbour')
-
-    # Cheapest-link
-    start_time2 = time.perf_counter()
-    seq_chl = cheapest_link(graph)
-    seq_chl = return_path_from_sequence_pairs(seq_chl)
-    distances.append(calculate_distance(graph.adjacency_matrix, seq_chl))
-    time_chl = (time.perf_counter() - start_time2) * 1000
-    times.append(time_chl)
-
-    plot_graph(graph, seq_chl, 'Cheapest-link')
-
-    # Christofides
-    start_time3 = time.perf_counter()
-    seq_chr = christofides(graph)
-    distances.append(calculate_distance(graph.adjacency_matrix, seq_chr))
-    time_chr = (time.perf_counter() - start_time3) * 1000
-    times.append(time_chr)
-
-    plot_graph(graph, seq_chr, 'Christofides')
-
-    print(distances)
-    print(times)
-
-    # plot distance a time graph as a bar graph
-    algorithms = ['Nearest Neighbour', 'Cheapest-link', 'Christofides']
-
-    plt.bar(algorithms, distances, color='maroon',
-            width=0.4)
-    plt.xlabel("Algorithms")
-    plt.ylabel("Distances")
-    plt.title("Distances")
-    plt.show()
-
-    plt.bar(algorithms, times, color='maroon',
-            width=0.4)
-    plt.xlabel("Algorithms")
-    plt.ylabel("Time in ms")
-    plt.title("Times")
-    plt.show()
+        for algorithm in options.algorithms:
+            if options.seed is not None:
+                random.seed(options.seed)
+            start_time = time.perf_counter()
+            sequence, timings = run_algorithm(graph, algorithm, options.matching, profiler)
+            results.append({'algorithm': algorithm, 'distance': calculate_distance(graph.adjacency_matrix, sequence),
+                            'time': elapsed_ms(start_time), 'tour': sequence, 'timings': timings})
+
+    for result in results:
+        if options.improve and (target is None or result['distance'] > target):
+            improve(graph, result, profiler)
+        result['tour'] = [int(vertex) for vertex in result['tour']]
+        if bound is not None:
+            result['gap'] = optimality_gap(result['distance'], bound)
+        if cache:
+            cache.store_tour(graph.coordinates, result['tour'], result['distance'])
+    output['results'] = results
+    if cache:
+        output['best_known'] = cache.load_tour(graph.coordinates)[1]
+    if profiler is not NULL_PROFILER:
+        output['profile'] = profiler.report()
+
+    if options.json:
+        if not options.tours:
+            output['results'] = [{key: value for key, value in result.items() if key != 'tour'} for result in results]
+        print(json.dumps(output))
+    else:
+        print_text(output)
+
+    if options.plot:
+        from helper_functions import plot_graph, plot_bars
+        for result in results:
+            plot_graph(graph, result['tour'], TITLES[result['algorithm']],
+                       plot_path(options.save_plots, result['algorithm'], options.plot_format))
+        if len(results) > 1:
+            titles = [TITLES[result['algorithm']] for result in results]
+            plot_bars(titles, [result['distance'] for result in results], 'Distances', 'Distances',
+                      plot_path(options.save_plots, 'distances', options.plot_format))
+            plot_bars(titles, [result['time'] for result in results], 'Time in ms', 'Times',
+                      plot_path(options.save_plots, 'times', options.plot_format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+import numpy as np
+
+from spatial_index import candidate_edges, complete_edges
+
+# number of nearest unmatched vertices of every vertex whose edges are candidates for greedy matching
+MATCHING_CANDIDATE_NEIGHBOURS = 10
+# lengths of edges are rounded to this many decimal places so blossom algorithm works with integers
+BLOSSOM_PRECISION = 6
+
+
+def greedy_matching(adjacency_matrix, vertices: list, k=MATCHING_CANDIDATE_NEIGHBOURS):
+    """
+    pair vertices greedily from the shortest edge, only edges to k nearest unmatched vertices are considered,
+    so every round pairs at least the two closest unmatched vertices
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param vertices: list of vertices of even length
+    :param k: number of nearest neighbours of every vertex
+    :return: list of pairs of vertices
+    """
+    if len(vertices) % 2:
+        raise ValueError(f'perfect matching needs an even number of vertices, got {len(vertices)}')
+    pairings = []
+    matched = set()
+    unmatched = list(vertices)
+    while unmatched:
+        first, second, lengths = candidate_edges(adjacency_matrix, k, unmatched)
+        for first_vertex, second_vertex in zip(first.tolist(), second.tolist()):
+            if first_vertex not in matched and second_vertex not in matched:
+                matched.add(first_vertex)
+                matched.add(second_vertex)
+                pairings.append([first_vertex, second_vertex])
+        unmatched = [vertex for vertex in unmatched if vertex not in matched]
+
+    return pairings
+
+
+def blossom_matching(adjacency_matrix, vertices: list):
+    """
+    minimum weight perfect matching of vertices computed by edmonds blossom algorithm on the complete graph
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param vertices: list of vertices of even length
+    :return: list of pairs of vertices
+    """
+    vertices = sorted(vertices)
+    first, second, lengths = complete_edges(adjacency_matrix, vertices)
+    position = {vertex: index for index, vertex in enumerate(vertices)}
+    weights = np.rint(lengths.astype(np.float64) * 10 ** BLOSSOM_PRECISION).astype(np.int64)
+    # maximal weight matching of maximal cardinality with inverted weights is minimal weight perfect matching
+    weights = (int(weights.max()) + 1 if len(weights) else 0) - weights
+    edges = [(position[first_vertex], position[second_vertex], weight) for first_vertex, second_vertex, weight
+             in zip(first.tolist(), second.tolist(), weights.tolist())]
+
+    mate = max_weight_matching(edges, max_cardinality=True)
+    return [[vertices[vertex], vertices[mate[vertex]]] for vertex in range(len(mate)) if vertex < mate[vertex]]
+
+
+def max_weight_matching(edges: list, max_cardinality=False):
+    """
+    maximal weight matching in a general graph, O(n^3) implementation of edmonds blossom algorithm
+    with dual variables (primal-dual method of galil), weights must be integers
+    :param edges: list of triplets in a format: (first vertex, second vertex, weight), vertices are 0..n-1
+    :param max_cardinality: find maximal weight matching among matchings of maximal cardinality
+    :return: list mate, mate[v] is a vertex matched to v or -1 if v is single
+    """
+    if not edges:
+        return []
+
+    number_of_edges = len(edges)
+    number_of_vertices = 1 + max(max(first, second) for first, second, weight in edges)
+    max_weight = max(0, max(weight for first, second, weight in edges))
+
+    # edge k has endpoints 2k and 2k + 1, endpoint[p] is a vertex of endpoint p, p ^ 1 is the other endpoint
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * number_of_edges)]
+    # neighbour_ends[v] contains remote endpoints of edges incident to vertex v
+    neighbour_ends = [[] for _ in range(number_of_vertices)]
+    for k, (first, second, weight) in enumerate(edges):
+        neighbour_ends[first].append(2 * k + 1)
+        neighbour_ends[second].append(2 * k)
+
+    # mate[v] is the remote endpoint of matched edge of vertex v or -1
+    mate = [-1] * number_of_vertices
+    # label of top-level blossoms: 0 free, 1 S-vertex (outer), 2 T-vertex (inner), labels of vertices are stored
+    # at indices < n and labels of non-trivial blossoms at indices >= n
+    label = [0] * (2 * number_of_vertices)
+    # endpoint through which a blossom obtained its label or -1
+    label_end = [-1] * (2 * number_of_vertices)
+    # top-level blossom that contains vertex v
+    in_blossom = list(range(number_of_vertices))
+    blossom_parent = [-1] * (2 * number_of_vertices)
+    # ordered list of sub-blossoms of a blossom, starting with the base
+    blossom_children = [None] * (2 * number_of_vertices)
+    blossom_base = list(range(number_of_vertices)) + [-1] * number_of_vertices
+    # blossom_ends[b][i] is an endpoint of the edge connecting sub-blossoms i and i + 1
+    blossom_ends = [None] * (2 * number_of_vertices)
+    # edge with the least slack to a different S-blossom, or to a free vertex for single vertices
+    best_edge = [-1] * (2 * number_of_vertices)
+    # list of least slack edges to neighbouring S-blossoms of a non-trivial S-blossom
+    blossom_best_edges = [None] * (2 * number_of_vertices)
+    unused_blossoms = list(range(number_of_vertices, 2 * number_of_vertices))
+    # dual variables of vertices and blossoms, all values are multiplied by two
+    dual = [max_weight] * number_of_vertices + [0] * number_of_vertices
+    # edges with zero slack that may be used in the alternating tree
+    allowed_edge = [False] * number_of_edges
+    queue = []
+
+    def slack(k):
+        first, second, weight = edges[k]
+        return dual[first] + dual[second] - 2 * weight
+
+    def blossom_leaves(b):
+        if b < number_of_vertices:
+            yield b
+        else:
+            stack = [b]
+            while stack:
+                for child in blossom_children[stack.pop()]:
+                    if child < number_of_vertices:
+                        yield child
+                    else:
+                        stack.append(child)
+
+    def assign_label(w, t, p):
+        # label vertex w and its top-level blossom with label t through endpoint p
+        while True:
+            b = in_blossom[w]
+            label[w] = label[b] = t
+            label_end[w] = label_end[b] = p
+            best_edge[w] = best_edge[b] = -1
+            if t == 1:
+                queue.extend(blossom_leaves(b))
+                return
+            # b became a T-blossom, its mate becomes an S-blossom
+            base = blossom_base[b]
+            w, t, p = endpoint[mate[base]], 1, mate[base] ^ 1
+
+    def scan_blossom(v, w):
+        # trace back from S-vertices v and w to find either a new blossom (returns its base) or an augmenting path
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = in_blossom[v]
+            if label[b] & 4:
+                base = blossom_base[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if label_end[b] == -1:
+                v = -1
+            else:
+                v = endpoint[label_end[b]]
+                b = in_blossom[v]
+                v = endpoint[label_end[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        # construct a new blossom with given base, containing edge k which connects a pair of S-vertices
+        v, w, weight = edges[k]
+        base_blossom = in_blossom[base]
+        bv = in_blossom[v]
+        bw = in_blossom[w]
+        b = unused_blossoms.pop()
+        blossom_base[b] = base
+        blossom_parent[b] = -1
+        blossom_parent[base_blossom] = b
+        blossom_children[b] = path = []
+        blossom_ends[b] = ends = []
+        while bv != base_blossom:
+            blossom_parent[bv] = b
+            path.append(bv)
+            ends.append(label_end[bv])
+            v = endpoint[label_end[bv]]
+            bv = in_blossom[v]
+        path.append(base_blossom)
+        path.reverse()
+        ends.reverse()
+        ends.append(2 * k)
+        while bw != base_blossom:
+            blossom_parent[bw] = b
+            path.append(bw)
+            ends.append(label_end[bw] ^ 1)
+            w = endpoint[label_end[bw]]
+            bw = in_blossom[w]
+        label[b] = 1
+        label_end[b] = label_end[base_blossom]
+        dual[b] = 0
+        for v in blossom_leaves(b):
+            if label[in_blossom[v]] == 2:
+                # former T-vertex becomes S-vertex
+                queue.append(v)
+            in_blossom[v] = b
+
+        best_edge_to = [-1] * (2 * number_of_vertices)
+        for bv in path:
+            if blossom_best_edges[bv] is None:
+                neighbour_lists = [[p // 2 for p in neighbour_ends[v]] for v in blossom_leaves(bv)]
+            else:
+                neighbour_lists = [blossom_best_edges[bv]]
+            for neighbour_list in neighbour_lists:
+                for k in neighbour_list:
+                    i, j, weight = edges[k]
+                    if in_blossom[j] == b:
+                        i, j = j, i
+                    bj = in_blossom[j]
+                    if bj != b and label[bj] == 1 and (best_edge_to[bj] == -1 or slack(k) < slack(best_edge_to[bj])):
+                        best_edge_to[bj] = k
+            blossom_best_edges[bv] = None
+            best_edge[bv] = -1
+        blossom_best_edges[b] = [k for k in best_edge_to if k != -1]
+        best_edge[b] = -1
+        for k in blossom_best_edges[b]:
+            if best_edge[b] == -1 or slack(k) < slack(best_edge[b]):
+                best_edge[b] = k
+
+    def expand_blossom(b, end_stage):
+        # expand top-level blossom b into its sub-blossoms
+        for child in blossom_children[b]:
+            blossom_parent[child] = -1
+            if child < number_of_vertices:
+                in_blossom[child] = child
+            elif end_stage and dual[child] == 0:
+                expand_blossom(child, end_stage)
+            else:
+                for v in blossom_leaves(child):
+                    in_blossom[v] = child
+
+        if not end_stage and label[b] == 2:
+            # relabel sub-blossoms on the even path from the entry child to the base
+            entry_child = in_blossom[endpoint[label_end[b] ^ 1]]
+            j = blossom_children[b].index(entry_child)
+            if j & 1:
+                j -= len(blossom_children[b])
+                j_step = 1
+                end_trick = 0
+            else:
+                j_step = -1
+                end_trick = 1
+            p = label_end[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossom_ends[b][j - end_trick] ^ end_trick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowed_edge[blossom_ends[b][j - end_trick] // 2] = True
+                j += j_step
+                p = blossom_ends[b][j - end_trick] ^ end_trick
+                allowed_edge[p // 2] = True
+                j += j_step
+            bv = blossom_children[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            label_end[endpoint[p ^ 1]] = label_end[bv] = p
+            best_edge[bv] = -1
+            j += j_step
+            while blossom_children[b][j] != entry_child:
+                # sub-blossoms on the odd path may contain vertices reached through a T-vertex
+                bv = blossom_children[b][j]
+                if label[bv] == 1:
+                    j += j_step
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossom_base[bv]]]] = 0
+                    assign_label(v, 2, label_end[v])
+                j += j_step
+
+        label[b] = label_end[b] = -1
+        blossom_children[b] = blossom_ends[b] = None
+        blossom_base[b] = -1
+        blossom_best_edges[b] = None
+        best_edge[b] = -1
+        unused_blossoms.append(b)
+
+    def augment_blossom(b, v):
+        # swap matched and unmatched edges on the even path from vertex v to the base of blossom b
+        t = v
+        while blossom_parent[t] != b:
+            t = blossom_parent[t]
+        if t >= number_of_vertices:
+            augment_blossom(t, v)
+        i = j = blossom_children[b].index(t)
+        if i & 1:
+            j -= len(blossom_children[b])
+            j_step = 1
+            end_trick = 0
+        else:
+            j_step = -1
+            end_trick = 1
+        while j != 0:
+            j += j_step
+            t = blossom_children[b][j]
+            p = blossom_ends[b][j - end_trick] ^ end_trick
+            if t >= number_of_vertices:
+                augment_blossom(t, endpoint[p])
+            j += j_step
+            t = blossom_children[b][j]
+            if t >= number_of_vertices:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossom_children[b] = blossom_children[b][i:] + blossom_children[b][:i]
+        blossom_ends[b] = blossom_ends[b][i:] + blossom_ends[b][:i]
+        blossom_base[b] = blossom_base[blossom_children[b][0]]
+
+    def augment_matching(k):
+        # swap matched and unmatched edges over the augmenting path through edge k
+        v, w, weight = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = in_blossom[s]
+                if bs >= number_of_vertices:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if label_end[bs] == -1:
+                    break
+                t = endpoint[label_end[bs]]
+                bt = in_blossom[t]
+                s = endpoint[label_end[bt]]
+                j = endpoint[label_end[bt] ^ 1]
+                if bt >= number_of_vertices:
+                    augment_blossom(bt, j)
+                mate[j] = label_end[bt]
+                p = label_end[bt] ^ 1
+
+    for _ in range(number_of_vertices):
+        # each stage finds one augmenting path
+        label[:] = [0] * (2 * number_of_vertices)
+        best_edge[:] = [-1] * (2 * number_of_vertices)
+        blossom_best_edges[number_of_vertices:] = [None] * number_of_vertices
+        allowed_edge[:] = [False] * number_of_edges
+        queue[:] = []
+        for v in range(number_of_vertices):
+            if mate[v] == -1 and label[in_blossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbour_ends[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if in_blossom[v] == in_blossom[w]:
+                        continue
+                    if not allowed_edge[k]:
+                        k_slack = slack(k)
+                        if k_slack <= 0:
+                            allowed_edge[k] = True
+                    if allowed_edge[k]:
+                        if label[in_blossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[in_blossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            # w is inside a T-blossom but was not reached yet
+                            label[w] = 2
+                            label_end[w] = p ^ 1
+                    elif label[in_blossom[w]] == 1:
+                        b = in_blossom[v]
+                        if best_edge[b] == -1 or k_slack < slack(best_edge[b]):
+                            best_edge[b] = k
+                    elif label[w] == 0:
+                        if best_edge[w] == -1 or k_slack < slack(best_edge[w]):
+                            best_edge[w] = k
+
+            if augmented:
+                break
+
+            # no augmenting path with current duals, find the smallest change of dual variables
+            delta_type = -1
+            delta = delta_edge = delta_blossom = None
+            if not max_cardinality:
+                delta_type = 1
+                delta = min(dual[:number_of_vertices])
+            for v in range(number_of_vertices):
+                if label[in_blossom[v]] == 0 and best_edge[v] != -1:
+                    d = slack(best_edge[v])
+                    if delta_type == -1 or d < delta:
+                        delta, delta_type, delta_edge = d, 2, best_edge[v]
+            for b in range(2 * number_of_vertices):
+                if blossom_parent[b] == -1 and label[b] == 1 and best_edge[b] != -1:
+                    d = slack(best_edge[b]) // 2
+                    if delta_type == -1 or d < delta:
+                        delta, delta_type, delta_edge = d, 3, best_edge[b]
+            for b in range(number_of_vertices, 2 * number_of_vertices):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1 and label[b] == 2 and \
+                        (delta_type == -1 or dual[b] < delta):
+                    delta, delta_type, delta_blossom = dual[b], 4, b
+            if delta_type == -1:
+                # maximal cardinality matching is optimal
+                delta_type = 1
+                delta = max(0, min(dual[:number_of_vertices]))
+
+            for v in range(number_of_vertices):
+                if label[in_blossom[v]] == 1:
+                    dual[v] -= delta
+                elif label[in_blossom[v]] == 2:
+                    dual[v] += delta
+            for b in range(number_of_vertices, 2 * number_of_vertices):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                    if label[b] == 1:
+                        dual[b] += delta
+                    elif label[b] == 2:
+                        dual[b] -= delta
+
+            if delta_type == 1:
+                break
+            elif delta_type == 2:
+                allowed_edge[delta_edge] = True
+                i, j, weight = edges[delta_edge]
+                if label[in_blossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif delta_type == 3:
+                allowed_edge[delta_edge] = True
+                i, j, weight = edges[delta_edge]
+                queue.append(i)
+            else:
+                expand_blossom(delta_blossom, False)
+
+        if not augmented:
+            break
+
+        # expand S-blossoms with zero dual variable at the end of the stage
+        for b in range(number_of_vertices, 2 * number_of_vertices):
+            if blossom_parent[b] == -1 and blossom_base[b] >= 0 and label[b] == 1 and dual[b] == 0:
+                expand_blossom(b, True)
+
+    for v in range(number_of_vertices):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+
+    return mate
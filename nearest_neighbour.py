@@ -1,40 +1,34 @@
 import random
 
-from vertex import DIAGONAL_LENGTH
+from spatial_index import GridIndex
+from profiler import NULL_PROFILER
 
 
-def nearest_neighbour(graph, start=None):
+def nearest_neighbour(graph, start=None, profiler=None):
     """
-    algorithm that creates path using nearest neighbour algorithm
+    algorithm that creates path using nearest neighbour algorithm,
+    closest unvisited vertex is found by a query to a grid index of unvisited vertices
     :param graph: graph class
     :param start: starting vertex to form a path through all vertices
+    :param profiler: optional Profiler that measures phases of the algorithm
     :return: sequence of vertices to create hamiltonian circuit
     """
-    adjacency_matrix = graph.adjacency_matrix
+    profiler = profiler or NULL_PROFILER
     number_of_vertices = graph.N
     if start is None:
         start = random.randint(0, number_of_vertices-1)
     sequence = [start]
-    visited = [False] * number_of_vertices
-    visited[start] = True
+    with profiler.phase('nearest_neighbour'):
+        with profiler.phase('index'):
+            unvisited = GridIndex(graph.coordinates)
+            unvisited.remove(start)
 
-    for j in range(number_of_vertices):
-        last_visited_vertex = sequence[-1]
-        distance = DIAGONAL_LENGTH
-        closest_vertex = None
-        for i in range(len(adjacency_matrix[last_visited_vertex])):
-            if adjacency_matrix[last_visited_vertex][i] < distance and visited[last_visited_vertex + i + 1] is False:
-                distance = adjacency_matrix[last_visited_vertex][i]
-                closest_vertex = last_visited_vertex + i + 1
-
-        for i in range(last_visited_vertex):
-            if adjacency_matrix[i][last_visited_vertex - number_of_vertices] < distance and visited[i] is False:
-                distance = adjacency_matrix[i][last_visited_vertex - number_of_vertices]
-                closest_vertex = i
-
-        if closest_vertex is not None:
-            sequence.append(closest_vertex)
-            visited[closest_vertex] = True
+        with profiler.phase('search'):
+            for j in range(number_of_vertices - 1):
+                closest_vertex = unvisited.nearest(sequence[-1])
+                sequence.append(closest_vertex)
+                unvisited.remove(closest_vertex)
+            profiler.count('queries', number_of_vertices - 1)
 
     sequence.append(sequence[0])
     return sequence
@@ -0,0 +1,149 @@
+import multiprocessing
+import time
+
+import numpy as np
+
+from vertex import Graph
+from portfolio import solve
+from space_filling_curve import hilbert_index
+from local_search import LocalSearch
+
+# largest number of vertices in one cell of the partition
+CELL_SIZE = 1000
+# algorithms that can solve cells of the partition
+PARTITION_ALGORITHMS = ['nearest_neighbour', 'christofides']
+
+
+def kd_partition(coordinates, cell_size=None):
+    """
+    split the plane recursively at the median of the wider side until every cell has at most cell_size vertices
+    :param coordinates: array of coordinates of vertices with shape (N, 2)
+    :param cell_size: largest number of vertices in one cell, CELL_SIZE if None
+    :return: list of arrays of vertices of cells ordered along the hilbert curve through centres of cells
+    """
+    cell_size = cell_size or CELL_SIZE
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    cells = []
+    stack = [np.arange(len(coordinates))]
+    while stack:
+        vertices = stack.pop()
+        if len(vertices) <= cell_size:
+            cells.append(vertices)
+            continue
+        points = coordinates[vertices]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        half = len(vertices) // 2
+        order = np.argpartition(points[:, axis], half)
+        stack.append(vertices[order[half:]])
+        stack.append(vertices[order[:half]])
+
+    centres = np.array([coordinates[vertices].mean(axis=0) for vertices in cells])
+    return [cells[cell] for cell in np.argsort(hilbert_index(centres), kind='stable')]
+
+
+def solve_cell(task):
+    """
+    :param task: tuple in a format: (coordinates of vertices of the cell, algorithm, seed)
+    :return: sequence of vertices of the cell that form a hamiltonian circuit without the repeated starting
+    vertex as an array of indices to the coordinates and time in ms
+    """
+    coordinates, algorithm, seed = task
+    start_time = time.perf_counter()
+    if len(coordinates) < 3:
+        sequence = list(range(len(coordinates))) + [0]
+    else:
+        sequence = solve(Graph(len(coordinates), coordinates=coordinates), algorithm, seed)[0]
+    return np.asarray(sequence[:-1], dtype=np.int64), (time.perf_counter() - start_time) * 1000
+
+
+def open_cycle(coordinates, cycle, entry_from, exit_to):
+    """
+    remove one edge of a cycle so that the path from entry_from through the cycle to exit_to is the shortest
+    :param coordinates: array of coordinates of all vertices with shape (N, 2)
+    :param cycle: array of vertices of the cycle
+    :param entry_from: point from which the path enters the cycle
+    :param exit_to: point to which the path leaves the cycle
+    :return: array of vertices of the cycle as a path
+    """
+    points = coordinates[cycle]
+    following = np.roll(points, -1, axis=0)
+    edges = np.hypot(*(points - following).T)
+    # path enters at the following vertex of the removed edge and goes forward, or enters at its first vertex
+    # and goes backward
+    forward = np.hypot(*(following - entry_from).T) + np.hypot(*(points - exit_to).T) - edges
+    backward = np.hypot(*(points - entry_from).T) + np.hypot(*(following - exit_to).T) - edges
+    edge = int(np.argmin(np.minimum(forward, backward)))
+    path = np.roll(cycle, -(edge + 1))
+    return path if forward[edge] <= backward[edge] else path[::-1]
+
+
+def stitch(coordinates, cycles):
+    """
+    join cycles of consecutive cells into one hamiltonian circuit, every cycle is opened at the edge
+    that connects it best with the end of the previous cell and the centre of the next cell
+    :param coordinates: array of coordinates of all vertices with shape (N, 2)
+    :param cycles: list of arrays of vertices of cycles in the order in which they are joined
+    :return: array of vertices of the circuit without the repeated starting vertex and list of pairs
+    of vertices that were connected across cells
+    """
+    centres = [coordinates[cycle].mean(axis=0) for cycle in cycles]
+    paths = []
+    for cell, cycle in enumerate(cycles):
+        entry_from = coordinates[paths[-1][-1]] if paths else centres[-1]
+        exit_to = centres[cell + 1] if cell + 1 < len(cycles) else coordinates[paths[0][0]] if paths else centres[0]
+        paths.append(open_cycle(coordinates, cycle, entry_from, exit_to))
+    seams = [(int(paths[cell - 1][-1]), int(paths[cell][0])) for cell in range(len(paths))]
+    return np.concatenate(paths), seams
+
+
+def solve_partitioned(graph, algorithm='nearest_neighbour', cell_size=None, seed=0, processes=None, repair=True):
+    """
+    divide and conquer solver for large instances, the plane is partitioned into cells by a k-d split,
+    cells are solved in parallel worker processes and their tours are stitched together,
+    the stitched tour is repaired by local search started only from vertices around the seams
+    :param graph: class Graph, distances are not used so it may be matrix free
+    :param algorithm: name of the algorithm from PARTITION_ALGORITHMS that solves every cell
+    :param cell_size: largest number of vertices in one cell, CELL_SIZE if None
+    :param seed: master seed from which seeds of cells are derived
+    :param processes: number of worker processes, all cpus if None, 1 solves cells in this process
+    :param repair: improve the tour around the seams by 2-opt and or-opt local search
+    :return: sequence of vertices that form a hamiltonian circuit, its distance and dictionary of statistics
+    in a format: {'cells': list of pairs (vertices, time), 'partition', 'solve', 'stitch', 'repair'},
+    all times are in ms, 'solve' is the wall time of solving all cells
+    """
+    if algorithm not in PARTITION_ALGORITHMS:
+        raise ValueError(f'unknown algorithm: {algorithm}')
+    coordinates = np.asarray(graph.coordinates, dtype=np.float64)
+    statistics = {}
+
+    start_time = time.perf_counter()
+    cells = kd_partition(coordinates, cell_size)
+    seeds = [int(cell_seed.generate_state(1)[0]) for cell_seed in np.random.SeedSequence(seed).spawn(len(cells))]
+    tasks = [(coordinates[vertices], algorithm, cell_seed) for vertices, cell_seed in zip(cells, seeds)]
+    statistics['partition'] = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    if processes == 1 or len(cells) == 1:
+        results = [solve_cell(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(solve_cell, tasks)
+    statistics['solve'] = (time.perf_counter() - start_time) * 1000
+    statistics['cells'] = [(len(vertices), elapsed) for vertices, (_, elapsed) in zip(cells, results)]
+
+    start_time = time.perf_counter()
+    tour, seams = stitch(coordinates, [vertices[cycle] for vertices, (cycle, _) in zip(cells, results)])
+    sequence = tour.tolist() + tour[:1].tolist()
+    statistics['stitch'] = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    if repair and len(cells) > 1:
+        local_search = LocalSearch(graph, sequence)
+        local_search.set_tour(sequence)
+        for first, second in seams:
+            local_search.activate(first, second, *local_search.neighbours[first], *local_search.neighbours[second])
+        sequence = local_search.run()
+    statistics['repair'] = (time.perf_counter() - start_time) * 1000
+
+    points = coordinates[sequence]
+    return sequence, float(np.hypot(*np.diff(points, axis=0).T).sum()), statistics
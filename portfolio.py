@@ -0,0 +1,141 @@
+import multiprocessing
+import random
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from vertex import Graph, DistanceMatrix
+from nearest_neighbour import nearest_neighbour
+from cheapest_link import cheapest_link
+from christofides import christofides
+from helper_functions import return_path_from_sequence_pairs, calculate_distance
+
+# algorithms started by the portfolio
+PORTFOLIO_ALGORITHMS = ['nearest_neighbour', 'cheapest_link', 'christofides']
+# algorithms without random choices, they are started only once
+DETERMINISTIC_ALGORITHMS = {'cheapest_link'}
+
+# graph of a worker process, its arrays are views of the shared memory of the parent process
+worker_graph = None
+# shared memory blocks of a worker process, kept open while the worker uses the graph
+worker_memory = []
+
+
+def share_array(array):
+    """
+    copy array to a new block of shared memory
+    :return: shared memory block and description of the array in a format: (name, shape, dtype)
+    """
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def attach_array(description):
+    """
+    :param description: description of the array returned by share_array
+    :return: shared memory block and array that uses it as a buffer
+    """
+    name, shape, dtype = description
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def init_worker(coordinates_description, data_description, dtype, matrix_free: bool):
+    """
+    create graph of a worker process from coordinates and distances in shared memory,
+    distances are not computed again
+    """
+    global worker_graph
+    memory, coordinates = attach_array(coordinates_description)
+    worker_memory.append(memory)
+    adjacency_matrix = None
+    if data_description is not None:
+        memory, data = attach_array(data_description)
+        worker_memory.append(memory)
+        adjacency_matrix = DistanceMatrix(coordinates, dtype, data)
+    worker_graph = Graph(len(coordinates), dtype=dtype, matrix_free=matrix_free, adjacency_matrix=adjacency_matrix,
+                         coordinates=coordinates)
+
+
+def solve(graph, algorithm: str, seed: int):
+    """
+    run one algorithm with the random module seeded by seed
+    :return: sequence of vertices that form a hamiltonian circuit, its distance and time in ms
+    """
+    random.seed(seed)
+    start_time = time.perf_counter()
+    if algorithm == 'nearest_neighbour':
+        sequence = nearest_neighbour(graph)
+    elif algorithm == 'cheapest_link':
+        sequence = return_path_from_sequence_pairs(cheapest_link(graph))
+    elif algorithm == 'christofides':
+        sequence = christofides(graph)
+    else:
+        raise ValueError(f'unknown algorithm: {algorithm}')
+    elapsed = (time.perf_counter() - start_time) * 1000
+    return sequence, calculate_distance(graph.adjacency_matrix, sequence), elapsed
+
+
+def solve_in_worker(task):
+    """
+    :param task: pair in a format: (algorithm, seed)
+    :return: sequence as an array, its distance and time in ms
+    """
+    sequence, distance, elapsed = solve(worker_graph, *task)
+    return np.asarray(sequence, dtype=np.int64), distance, elapsed
+
+
+def portfolio_tasks(starts: int, seed: int, algorithms=PORTFOLIO_ALGORITHMS):
+    """
+    :return: list of pairs in a format: (algorithm, seed of the run), seeds of runs are derived from seed
+    """
+    tasks = []
+    for algorithm in algorithms:
+        tasks.extend((algorithm, None) for _ in range(1 if algorithm in DETERMINISTIC_ALGORITHMS else starts))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    return [(algorithm, int(task_seed.generate_state(1)[0])) for (algorithm, _), task_seed in zip(tasks, seeds)]
+
+
+def solve_portfolio(graph, starts=8, seed=0, algorithms=PORTFOLIO_ALGORITHMS, processes=None):
+    """
+    run every algorithm from many seeded starts in a pool of processes, coordinates and the distance matrix
+    are passed to the workers through shared memory, the result depends only on seed
+    :param graph: class Graph
+    :param starts: number of runs of every algorithm that uses random choices
+    :param seed: master seed from which seeds of all runs are derived
+    :param algorithms: names of the algorithms from PORTFOLIO_ALGORITHMS
+    :param processes: number of worker processes, all cpus if None, 1 runs everything in this process
+    :return: best sequence of vertices that form a hamiltonian circuit, its distance, algorithm that found it
+    and dictionary of algorithms and their statistics in a format: {'runs', 'best', 'mean', 'worst', 'time'},
+    time is the mean time of one run in ms
+    """
+    tasks = portfolio_tasks(starts, seed, algorithms)
+    processes = processes or multiprocessing.cpu_count()
+
+    if processes == 1:
+        results = [solve(graph, *task) for task in tasks]
+    else:
+        shared = [share_array(graph.coordinates)]
+        if not graph.matrix_free:
+            shared.append(share_array(graph.adjacency_matrix.data))
+        try:
+            data_description = shared[1][1] if len(shared) > 1 else None
+            with multiprocessing.Pool(processes, init_worker,
+                                      (shared[0][1], data_description, graph.dtype, graph.matrix_free)) as pool:
+                results = pool.map(solve_in_worker, tasks)
+        finally:
+            for memory, description in shared:
+                memory.close()
+                memory.unlink()
+
+    best = min(range(len(tasks)), key=lambda task: results[task][1])
+    statistics = {}
+    for algorithm in algorithms:
+        distances = [distance for (name, _), (_, distance, _) in zip(tasks, results) if name == algorithm]
+        times = [elapsed for (name, _), (_, _, elapsed) in zip(tasks, results) if name == algorithm]
+        statistics[algorithm] = {'runs': len(distances), 'best': min(distances), 'mean': float(np.mean(distances)),
+                                 'worst': max(distances), 'time': float(np.mean(times))}
+
+    return [int(vertex) for vertex in results[best][0]], results[best][1], tasks[best][0], statistics
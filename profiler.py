@@ -0,0 +1,87 @@
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    """
+    collects wall time, number of calls, counters and optionally peak memory of named phases,
+    phases can be nested and the name of a nested phase is prefixed by names of enclosing phases
+    """
+    def __init__(self, trace_memory=False):
+        """
+        :param trace_memory: measure peak memory of phases with tracemalloc, slows down the measured code
+        """
+        self.trace_memory = trace_memory
+        self.phases = {}
+        # names of entered phases and the highest traced memory of every entered phase
+        self.stack = []
+        self.peaks = []
+
+    def current(self):
+        """
+        :return: statistics of the innermost entered phase, phase '' when no phase was entered
+        """
+        return self.phases.setdefault('/'.join(self.stack), {'time': 0.0, 'calls': 0, 'counters': {}})
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        context manager that measures the code inside it as a phase with given name
+        """
+        self.stack.append(name)
+        statistics = self.current()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        started_tracing = self.trace_memory and not tracing
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append(current)
+            start_memory = current
+        start_time = time.perf_counter()
+        try:
+            yield statistics
+        finally:
+            statistics['time'] += (time.perf_counter() - start_time) * 1000
+            statistics['calls'] += 1
+            if self.trace_memory:
+                peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                statistics['peak_memory'] = max(statistics.get('peak_memory', 0), peak - start_memory)
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                tracemalloc.reset_peak()
+            if started_tracing:
+                tracemalloc.stop()
+            self.stack.pop()
+
+    def count(self, name: str, value=1):
+        """
+        add value to a counter of the innermost entered phase
+        """
+        counters = self.current()['counters']
+        counters[name] = counters.get(name, 0) + value
+
+    def report(self):
+        """
+        :return: dictionary of phases and their statistics in a format: {'time', 'calls', 'counters'} and also
+        'peak_memory' in bytes when memory is traced, time is in ms
+        """
+        return {name: statistics for name, statistics in self.phases.items() if name}
+
+
+class NullProfiler:
+    """
+    profiler that records nothing, used by functions when no profiler is given
+    """
+    def phase(self, name: str):
+        return nullcontext()
+
+    def count(self, name: str, value=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
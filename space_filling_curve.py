@@ -0,0 +1,62 @@
+import numpy as np
+
+from profiler import NULL_PROFILER
+
+# number of bits of a coordinate on the hilbert curve, the curve passes through a grid of 2^ORDER x 2^ORDER cells
+HILBERT_ORDER = 16
+
+
+def hilbert_index(coordinates, order=None):
+    """
+    distance of points along the hilbert curve over the bounding square of the points,
+    all points are processed at once by integer bit operations
+    :param coordinates: array of coordinates with shape (N, 2)
+    :param order: number of bits of a coordinate on the curve, at most 31
+    :return: array of distances along the curve with type uint64
+    """
+    order = order or HILBERT_ORDER
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if not len(coordinates):
+        return np.empty(0, dtype=np.uint64)
+    low = coordinates.min(axis=0)
+    # the same scale on both axes, so the curve is not stretched
+    size = float((coordinates.max(axis=0) - low).max()) or 1.0
+    cells = np.uint32((1 << order) - 1)
+    scaled = np.rint((coordinates - low) * (int(cells) / size)).astype(np.uint32)
+    x, y = scaled[:, 0].copy(), scaled[:, 1].copy()
+
+    index = np.zeros(len(coordinates), dtype=np.uint64)
+    for bit in range(order - 1, -1, -1):
+        rx = (x >> bit) & 1
+        ry = (y >> bit) & 1
+        index += ((rx * 3) ^ ry).astype(np.uint64) << np.uint64(2 * bit)
+        # rotate the quadrant so the curve inside it has the orientation of the whole curve,
+        # masks of all ones (negated 1 in unsigned integers) select the rotated points without branches
+        ry ^= 1
+        flip = np.negative(rx & ry) & cells
+        x ^= flip
+        y ^= flip
+        swap = (x ^ y) & np.negative(ry)
+        x ^= swap
+        y ^= swap
+    return index
+
+
+def hilbert_curve(graph, order=None, profiler=None):
+    """
+    algorithm that creates path by visiting vertices in their order along the hilbert curve,
+    it needs only O(N log N) time and no distances, so it suits instances with millions of vertices
+    and as a starting tour for local search
+    :param graph: graph class
+    :param order: number of bits of a coordinate on the curve, HILBERT_ORDER if None
+    :param profiler: optional Profiler that measures phases of the algorithm
+    :return: sequence of vertices to create hamiltonian circuit
+    """
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('hilbert_curve'):
+        with profiler.phase('index'):
+            index = hilbert_index(graph.coordinates, order)
+        with profiler.phase('sort'):
+            sequence = np.argsort(index, kind='stable').tolist()
+    sequence.append(sequence[0])
+    return sequence
@@ -0,0 +1,262 @@
+import heapq
+import math
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    uniform grid over coordinates of vertices, supports nearest neighbour queries and deletion of vertices,
+    the grid is rebuilt with bigger cells when most of the vertices are deleted so queries stay local
+    """
+    def __init__(self, coordinates, indices=None, points_per_cell=2):
+        """
+        :param coordinates: array of coordinates of all vertices with shape (N, 2)
+        :param indices: vertices that are inserted into the index, all vertices if None
+        :param points_per_cell: average number of vertices in one cell of the grid
+        """
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.xs = self.coordinates[:, 0].tolist()
+        self.ys = self.coordinates[:, 1].tolist()
+        self.points_per_cell = points_per_cell
+        self.alive = np.zeros(len(self.coordinates), dtype=bool)
+        if indices is None:
+            self.alive[:] = True
+        else:
+            self.alive[np.asarray(indices, dtype=np.int64)] = True
+        self.build()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, index):
+        return bool(self.alive[index])
+
+    def build(self):
+        """
+        distribute all vertices that were not deleted into cells of the grid
+        """
+        indices = np.flatnonzero(self.alive)
+        self.size = self.built_size = len(indices)
+        points = self.coordinates[indices]
+        if len(indices):
+            self.min_x, self.min_y = points.min(axis=0)
+            width, height = points.max(axis=0) - (self.min_x, self.min_y)
+        else:
+            self.min_x = self.min_y = width = height = 0.0
+        self.max_x = self.min_x + width
+        self.max_y = self.min_y + height
+
+        number_of_cells = max(1, len(indices) // self.points_per_cell)
+        self.cell_size = max(math.sqrt(width * height / number_of_cells), max(width, height) / number_of_cells, 1e-9)
+        self.columns = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+
+        self.cell_of = np.full(len(self.coordinates), -1, dtype=np.int64)
+        self.cell_of[indices] = self.cells_of_points(points)
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+        order = np.argsort(self.cell_of[indices], kind='stable')
+        for index, cell in zip(indices[order].tolist(), self.cell_of[indices[order]].tolist()):
+            self.cells[cell].append(index)
+
+    def cells_of_points(self, points):
+        """
+        :param points: array of coordinates with shape (n, 2)
+        :return: array of cells that contain the points
+        """
+        column = np.clip(((points[:, 0] - self.min_x) / self.cell_size).astype(np.int64), 0, self.columns - 1)
+        row = np.clip(((points[:, 1] - self.min_y) / self.cell_size).astype(np.int64), 0, self.rows - 1)
+        return row * self.columns + column
+
+    def cell_position(self, x: float, y: float):
+        """
+        :return: column and row of a cell that contains point (x, y), points outside of the grid are clipped
+        """
+        column = min(max(int((x - self.min_x) / self.cell_size), 0), self.columns - 1)
+        row = min(max(int((y - self.min_y) / self.cell_size), 0), self.rows - 1)
+        return column, row
+
+    def ring(self, column: int, row: int, radius: int):
+        """
+        :return: cells whose distance from cell (column, row) in the maximum metric is equal to radius
+        """
+        if radius == 0:
+            return [row * self.columns + column]
+        cells = []
+        first_column, last_column = max(column - radius, 0), min(column + radius, self.columns - 1)
+        for ring_row in (row - radius, row + radius):
+            if 0 <= ring_row < self.rows:
+                cells.extend(range(ring_row * self.columns + first_column, ring_row * self.columns + last_column + 1))
+        for ring_column in (column - radius, column + radius):
+            if 0 <= ring_column < self.columns:
+                for ring_row in range(max(row - radius + 1, 0), min(row + radius, self.rows)):
+                    cells.append(ring_row * self.columns + ring_column)
+        return cells
+
+    def remove(self, index: int):
+        """
+        delete vertex from the index
+        :param index: vertex that is deleted
+        """
+        if not self.alive[index]:
+            return
+        self.alive[index] = False
+        self.cells[self.cell_of[index]].remove(index)
+        self.size -= 1
+        if self.size * 4 < self.built_size and self.built_size > 64:
+            self.build()
+
+    def k_nearest_to(self, x: float, y: float, k: int):
+        """
+        find k vertices closest to point (x, y)
+        :return: list of pairs in a format: (squared distance, vertex) sorted from the closest vertex
+        """
+        xs, ys, cells = self.xs, self.ys, self.cells
+        column, row = self.cell_position(x, y)
+        max_radius = max(self.columns, self.rows)
+        # distance of the point from the grid, when it lies outside of it
+        outside_x = max(self.min_x - x, x - self.max_x, 0)
+        outside_y = max(self.min_y - y, y - self.max_y, 0)
+        # heap of the k closest vertices found so far, distances are negated to keep the farthest on top
+        closest = []
+        radius = 0
+        while radius <= max_radius:
+            for cell in self.ring(column, row, radius):
+                for index in cells[cell]:
+                    distance = (xs[index] - x) ** 2 + (ys[index] - y) ** 2
+                    if len(closest) < k:
+                        heapq.heappush(closest, (-distance, -index))
+                    elif (-distance, -index) > closest[0]:
+                        heapq.heapreplace(closest, (-distance, -index))
+            # vertices in farther rings are at least this far from the point
+            bound = radius * self.cell_size
+            bound = min((outside_x + bound) ** 2 + outside_y ** 2, outside_x ** 2 + (outside_y + bound) ** 2)
+            if len(closest) == k and -closest[0][0] <= bound:
+                break
+            radius += 1
+
+        return sorted((-distance, -index) for distance, index in closest)
+
+    def nearest_to(self, x: float, y: float):
+        """
+        :return: vertex closest to point (x, y) or None if the index is empty
+        """
+        closest = self.k_nearest_to(x, y, 1)
+        return closest[0][1] if closest else None
+
+    def nearest(self, index: int):
+        """
+        :return: vertex in the index closest to vertex index or None if the index is empty
+        """
+        return self.nearest_to(self.xs[index], self.ys[index])
+
+
+def k_nearest_neighbours(coordinates, k: int, indices=None):
+    """
+    find k nearest neighbours of every vertex, distances inside 3x3 blocks of grid cells are computed at once
+    and only vertices whose neighbours may lie outside of their block are queried one by one
+    :param coordinates: array of coordinates of all vertices with shape (N, 2)
+    :param k: number of neighbours
+    :param indices: vertices among which neighbours are searched, all vertices if None
+    :return: array of vertices and array with shape (len(vertices), min(k, len(vertices) - 1)) of their neighbours
+    sorted from the closest one
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    indices = np.arange(len(coordinates)) if indices is None else np.asarray(indices, dtype=np.int64)
+    k = max(0, min(k, len(indices) - 1))
+    neighbours = np.empty((len(indices), k), dtype=np.int64)
+    if k == 0:
+        return indices, neighbours
+
+    grid = GridIndex(coordinates, indices, points_per_cell=max(2, k // 2 + 1))
+    row_of = {vertex: row for row, vertex in enumerate(indices.tolist())}
+    unresolved = []
+    for cell, members in enumerate(grid.cells):
+        if not members:
+            continue
+        column, row = cell % grid.columns, cell // grid.columns
+        block = []
+        for block_row in range(max(row - 1, 0), min(row + 2, grid.rows)):
+            for block_column in range(max(column - 1, 0), min(column + 2, grid.columns)):
+                block.extend(grid.cells[block_row * grid.columns + block_column])
+        if len(block) <= k:
+            unresolved.extend(members)
+            continue
+
+        members = np.array(members, dtype=np.int64)
+        block = np.array(block, dtype=np.int64)
+        difference = coordinates[members, None, :] - coordinates[None, block, :]
+        distances = np.einsum('ijk,ijk->ij', difference, difference)
+        distances[members[:, None] == block[None, :]] = np.inf
+        member_rows = np.arange(len(members))[:, None]
+        closest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        closest_distances = distances[member_rows, closest]
+        closest_vertices = block[closest]
+        order = np.lexsort((closest_vertices, closest_distances), axis=1)
+        closest_vertices = closest_vertices[member_rows, order]
+        farthest = closest_distances.max(axis=1)
+
+        # neighbours outside of the block are farther than the border of the block,
+        # sides of the block at the border of the grid have no vertices behind them
+        x = coordinates[members, 0] - grid.min_x
+        y = coordinates[members, 1] - grid.min_y
+        border = np.full(len(members), np.inf)
+        if column > 1:
+            border = np.minimum(border, x - (column - 1) * grid.cell_size)
+        if column < grid.columns - 2:
+            border = np.minimum(border, (column + 2) * grid.cell_size - x)
+        if row > 1:
+            border = np.minimum(border, y - (row - 1) * grid.cell_size)
+        if row < grid.rows - 2:
+            border = np.minimum(border, (row + 2) * grid.cell_size - y)
+        resolved = farthest <= np.maximum(border, 0) ** 2
+
+        rows = [row_of[vertex] for vertex in members[resolved].tolist()]
+        neighbours[rows] = closest_vertices[resolved]
+        unresolved.extend(members[~resolved].tolist())
+
+    for vertex in unresolved:
+        closest = grid.k_nearest_to(grid.xs[vertex], grid.ys[vertex], k + 1)
+        closest = [neighbour for distance, neighbour in closest if neighbour != vertex][:k]
+        neighbours[row_of[vertex]] = closest
+
+    return indices, neighbours
+
+
+def candidate_edges(adjacency_matrix, k: int, indices=None):
+    """
+    create candidate edges between every vertex and its k nearest neighbours
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param k: number of neighbours of every vertex
+    :param indices: vertices among which edges are created, all vertices if None
+    :return: arrays of first vertices, second vertices and lengths of unique edges sorted from the shortest,
+    first vertex of every edge is the smaller one
+    """
+    vertices, neighbours = k_nearest_neighbours(adjacency_matrix.coordinates, k, indices)
+    first = np.repeat(vertices, neighbours.shape[1])
+    second = neighbours.ravel()
+    return sorted_edges(adjacency_matrix, np.minimum(first, second), np.maximum(first, second))
+
+
+def complete_edges(adjacency_matrix, indices):
+    """
+    :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+    :param indices: vertices among which edges are created
+    :return: arrays of first vertices, second vertices and lengths of all edges between vertices sorted from the
+    shortest, first vertex of every edge is the smaller one
+    """
+    indices = np.sort(np.asarray(indices, dtype=np.int64))
+    first, second = np.triu_indices(len(indices), 1)
+    return sorted_edges(adjacency_matrix, indices[first], indices[second])
+
+
+def sorted_edges(adjacency_matrix, first, second):
+    """
+    remove duplicated edges and sort them by length, ties are sorted by their vertices
+    :return: arrays of first vertices, second vertices and lengths of edges
+    """
+    edges = np.unique(np.stack([first, second], axis=1), axis=0)
+    first, second = edges[:, 0], edges[:, 1]
+    lengths = adjacency_matrix.distances(first, second)
+    order = np.lexsort((second, first, lengths))
+    return first[order], second[order], lengths[order]
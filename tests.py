@@ -1,13 +1,292 @@
+import asyncio
+import contextlib
+import itertools
+import io
+import json
 import unittest
 import math
+import random
+import os
+import tempfile
+import time
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 
-from vertex import Graph, Vertex
+import numpy as np
+
+from vertex import Graph, Vertex, DistanceMatrix, DistanceOracle
 from nearest_neighbour import nearest_neighbour
+from space_filling_curve import hilbert_index, hilbert_curve
+from spatial_index import GridIndex, k_nearest_neighbours, candidate_edges
+from disjoint_set import DisjointSet
+from matching import greedy_matching, blossom_matching, max_weight_matching
+from local_search import LocalSearch, improve_tour
+from tour import Tour
+from tour_repair import insert_vertex, remove_vertex, move_vertex
+from profiler import Profiler
+from anytime import solve_anytime
+from lower_bound import held_karp_bound, one_tree, sparse_one_tree, optimality_gap
+from cache import DiskCache, instance_key, cached_graph, cached_solve
+from portfolio import solve_portfolio, portfolio_tasks
+from partition import kd_partition, stitch, solve_partitioned
+from daemon import run_server, send_request, solve_request
+import main
+from batch import parse_instances, solve_batch
+from loader import load_text, load_tsplib, save_binary, load_binary, load_graph
+from benchmark import generate_coordinates, run_benchmark, compare_with_baseline, DISTRIBUTIONS
 from cheapest_link import cheapest_link
 from christofides import *
 from helper_functions import *
 
 
+class TestGraph(unittest.TestCase):
+    def test_distance_matrix(self):
+        graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 10, 10), Vertex(3, 20, 10)])
+        adjacency_matrix = graph.adjacency_matrix
+
+        self.assertEqual(adjacency_matrix.distance(0, 1), 10)
+        self.assertEqual(adjacency_matrix.distance(2, 0), math.sqrt(200))
+        self.assertEqual(adjacency_matrix.distance(3, 3), 0)
+        self.assertEqual(list(adjacency_matrix.distances_from(1)), [10, 0, 10, math.sqrt(200)])
+        self.assertEqual(list(adjacency_matrix.distances([0, 3], [2, 1])), [math.sqrt(200), math.sqrt(200)])
+        self.assertEqual(list(adjacency_matrix.distances([3, 0, 3], [3, 0, 0])), [0, 0, math.sqrt(500)])
+        self.assertEqual(calculate_distance(adjacency_matrix, [0, 3, 3, 0]), 2 * math.sqrt(500))
+
+    def test_blocked_distance_matrix(self):
+        graph = Graph(50)
+        coordinates = graph.coordinates
+
+        matrix = DistanceMatrix(coordinates, np.float32)
+        matrix.BLOCK_SIZE = 16
+        blocked = matrix.compute_distances()
+
+        self.assertEqual(blocked.dtype, np.float32)
+        for i in range(50):
+            for j in range(i):
+                expected = math.dist(coordinates[i], coordinates[j])
+                self.assertAlmostEqual(float(blocked[i * (i - 1) // 2 + j]), expected, places=3)
+                self.assertAlmostEqual(graph.adjacency_matrix.distance(j, i), expected)
+
+    def test_number_of_vertices(self):
+        with self.assertRaises(ValueError):
+            Graph(5, coordinates=[[0, 0], [1, 1]])
+        with self.assertRaises(ValueError):
+            Graph(1, [Vertex(0, 0, 0), Vertex(1, 1, 1)])
+
+    def test_distance_oracle(self):
+        vertices = [Vertex(i, (i * 37) % 101, (i * 59) % 103) for i in range(30)]
+        graph = Graph(30, vertices)
+        matrix_free_graph = Graph(30, vertices, matrix_free=True)
+
+        self.assertIsInstance(matrix_free_graph.adjacency_matrix, DistanceOracle)
+        for i in range(30):
+            self.assertTrue(np.allclose(graph.adjacency_matrix.distances_from(i),
+                                        matrix_free_graph.adjacency_matrix.distances_from(i)))
+            for j in range(30):
+                self.assertAlmostEqual(graph.adjacency_matrix.distance(i, j),
+                                       matrix_free_graph.adjacency_matrix.distance(i, j))
+
+        self.assertEqual(nearest_neighbour(graph, 0), nearest_neighbour(matrix_free_graph, 0))
+        self.assertEqual(cheapest_link(graph), cheapest_link(matrix_free_graph))
+        self.assertEqual(len(christofides(matrix_free_graph)), 31)
+
+    def test_vertex_view(self):
+        graph = Graph(3, [Vertex('a', 0, 0), Vertex('b', 0, 5), Vertex('c', 3, 0)])
+
+        self.assertEqual(len(graph.vertices), 3)
+        self.assertEqual((graph.vertices[1].info, graph.vertices[1].x, graph.vertices[1].y), ('b', 0, 5))
+        self.assertEqual(graph.vertices[-1].return_coordinates(), (3, 0))
+        self.assertEqual([vertex.info for vertex in graph.vertices], ['a', 'b', 'c'])
+        self.assertEqual([vertex.info for vertex in graph.vertices[:2]], ['a', 'b'])
+        with self.assertRaises(IndexError):
+            graph.vertices[3]
+        with self.assertRaises(AttributeError):
+            graph.vertices[0].z = 1
+
+    def test_random_graph(self):
+        random.seed(4)
+        graph = Graph(100)
+        random.seed(4)
+
+        self.assertEqual(graph.coordinates.tolist(), Graph(100).coordinates.tolist())
+        self.assertEqual(graph.labels.tolist(), list(range(100)))
+        self.assertTrue(((graph.coordinates >= 0) & (graph.coordinates <= 1000)).all())
+
+
+class TestGraphUpdates(unittest.TestCase):
+    def assert_distances(self, graph):
+        expected = Graph(graph.N, coordinates=graph.coordinates.copy())
+        for i in range(graph.N):
+            self.assertTrue(np.allclose(graph.adjacency_matrix.distances_from(i),
+                                        expected.adjacency_matrix.distances_from(i)))
+
+    def test_updates(self):
+        for matrix_free in (False, True):
+            graph = Graph(30, matrix_free=matrix_free)
+            coordinates = graph.coordinates.copy()
+
+            for number in range(20):
+                self.assertEqual(graph.add_vertex(number, 2 * number), 30 + number)
+            self.assertEqual(graph.remove_vertex(3), 49)
+            self.assertIsNone(graph.remove_vertex(48))
+            graph.move_vertex(10, 500, 500)
+
+            self.assertEqual(graph.N, 48)
+            self.assertEqual(graph.labels[3], 49)
+            self.assertEqual(graph.labels[-1], 47)
+            self.assertEqual(graph.vertices[10].return_coordinates(), (500, 500))
+            np.testing.assert_array_equal(graph.coordinates[:3], coordinates[:3])
+            self.assert_distances(graph)
+
+    def test_shared_data(self):
+        coordinates = np.array([[0, 0], [3, 4], [6, 8]], dtype=float)
+        data = DistanceMatrix(coordinates).data
+        data.flags.writeable = False
+        graph = Graph(3, adjacency_matrix=DistanceMatrix(coordinates, data=data), coordinates=coordinates)
+
+        graph.move_vertex(0, 6, 0)
+        graph.add_vertex(0, 0, 'depot')
+
+        self.assertEqual(coordinates[0].tolist(), [0, 0])
+        self.assertEqual(graph.labels.tolist(), [0, 1, 2, 'depot'])
+        self.assert_distances(graph)
+
+
+class TestTourRepair(unittest.TestCase):
+    def test_insert_vertex(self):
+        graph = Graph(4, coordinates=[[0, 0], [10, 0], [10, 10], [0, 10]])
+        vertex = graph.add_vertex(5, -1)
+
+        sequence = insert_vertex(graph, [0, 1, 2, 3, 0], vertex)
+
+        self.assertEqual(sequence, [0, 4, 1, 2, 3, 0])
+        self.assertEqual(insert_vertex(graph, [], 0), [0, 0])
+
+    def test_remove_vertex(self):
+        graph = Graph(5, coordinates=[[0, 0], [5, -1], [10, 0], [10, 10], [0, 10]])
+        moved = graph.remove_vertex(1)
+
+        sequence = remove_vertex([0, 1, 2, 3, 4, 0], 1, moved)
+
+        self.assertEqual(sequence, [0, 2, 3, 1, 0])
+        self.assertAlmostEqual(calculate_distance(graph.adjacency_matrix, sequence), 40)
+
+    def test_move_vertex(self):
+        graph = Graph(200)
+        sequence = improve_tour(graph, christofides(graph))
+        graph.move_vertex(7, 500, 500)
+
+        repaired = move_vertex(graph, sequence, 7)
+
+        self.assertEqual(sorted(repaired[:-1]), list(range(200)))
+        self.assertLessEqual(calculate_distance(graph.adjacency_matrix, repaired),
+                             calculate_distance(graph.adjacency_matrix, sequence))
+
+    def test_repair_tour(self):
+        graph = Graph(100)
+        tour = Tour(graph.adjacency_matrix, nearest_neighbour(graph, 0))
+        graph.move_vertex(7, 500, 500)
+
+        repaired = move_vertex(graph, tour, 7)
+
+        self.assertIsInstance(repaired, Tour)
+        self.assertEqual(sorted(repaired[:-1]), list(range(100)))
+        self.assertAlmostEqual(repaired.length, calculate_distance(graph.adjacency_matrix, repaired.sequence()))
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_nearest(self):
+        coordinates = np.array([[(i * 37) % 101, (i * 59) % 103] for i in range(200)], dtype=float)
+        index = GridIndex(coordinates)
+        alive = list(range(200))
+
+        for vertex in range(0, 200, 3):
+            index.remove(vertex)
+            alive.remove(vertex)
+            x, y = coordinates[vertex]
+            expected = min(alive, key=lambda u: ((coordinates[u][0] - x) ** 2 + (coordinates[u][1] - y) ** 2, u))
+            self.assertEqual(index.nearest(vertex), expected)
+
+        self.assertEqual(len(index), len(alive))
+        self.assertNotIn(0, index)
+
+    def test_k_nearest_to(self):
+        coordinates = np.array([[0, 0], [10, 0], [0, 3], [50, 50], [4, 4]], dtype=float)
+        index = GridIndex(coordinates)
+
+        self.assertEqual(index.k_nearest_to(1, 1, 3), [(2.0, 0), (5.0, 2), (18.0, 4)])
+        self.assertEqual(index.nearest_to(100, 100), 3)
+
+    def test_k_nearest_neighbours(self):
+        coordinates = np.array([[(i * 37) % 101, (i * 59) % 103] for i in range(300)], dtype=float)
+        vertices, neighbours = k_nearest_neighbours(coordinates, 6)
+
+        self.assertEqual(neighbours.shape, (300, 6))
+        for vertex in vertices:
+            distances = ((coordinates - coordinates[vertex]) ** 2).sum(axis=1)
+            distances[vertex] = np.inf
+            self.assertEqual(list(np.sort(distances)[:6]), list(distances[neighbours[vertex]]))
+
+    def test_candidate_edges(self):
+        graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 10, 10), Vertex(3, 20, 10)])
+        first, second, lengths = candidate_edges(graph.adjacency_matrix, 1)
+
+        self.assertEqual(list(first), [0, 1, 2])
+        self.assertEqual(list(second), [1, 2, 3])
+        self.assertEqual(list(lengths), [10, 10, 10])
+
+
+class TestDisjointSet(unittest.TestCase):
+    def test_union(self):
+        components = DisjointSet(5)
+
+        self.assertTrue(components.union(0, 1))
+        self.assertTrue(components.union(3, 4))
+        self.assertTrue(components.union(1, 4))
+        self.assertFalse(components.union(0, 3))
+        self.assertEqual(components.find(0), components.find(4))
+        self.assertNotEqual(components.find(2), components.find(0))
+
+
+class TestMatching(unittest.TestCase):
+    def test_greedy_matching(self):
+        graph = Graph(6, [Vertex(0, 0, 0), Vertex(1, 1, 0), Vertex(2, 10, 0), Vertex(3, 12, 0), Vertex(4, 50, 0),
+                          Vertex(5, 100, 0)])
+
+        pairings = greedy_matching(graph.adjacency_matrix, [0, 1, 2, 3, 4, 5], k=1)
+
+        self.assertEqual(pairings, [[0, 1], [2, 3], [4, 5]])
+        with self.assertRaises(ValueError):
+            greedy_matching(graph.adjacency_matrix, [0, 1, 2])
+
+    def test_blossom_matching(self):
+        # greedy pairs 1 with 2 first, optimal matching avoids the shortest edge
+        graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 19, 0), Vertex(3, 29, 0)])
+
+        self.assertEqual(greedy_matching(graph.adjacency_matrix, [0, 1, 2, 3]), [[1, 2], [0, 3]])
+        self.assertEqual(blossom_matching(graph.adjacency_matrix, [0, 1, 2, 3]), [[0, 1], [2, 3]])
+
+    def test_max_weight_matching(self):
+        # path 0-1-2-3 with heavy middle edge and a triangle 4-5-6 with pendant vertex 7
+        edges = [(0, 1, 5), (1, 2, 11), (2, 3, 5), (4, 5, 6), (5, 6, 7), (4, 6, 5), (6, 7, 2)]
+
+        self.assertEqual(max_weight_matching(edges), [-1, 2, 1, -1, 5, 4, 7, 6])
+        self.assertEqual(max_weight_matching(edges, max_cardinality=True), [1, 0, 3, 2, 5, 4, 7, 6])
+
+    def test_perfect_pairing(self):
+        graph = Graph(40)
+        timings = {}
+
+        greedy = perfect_pairing(graph.adjacency_matrix, list(range(40)), 'greedy', timings)
+        blossom = perfect_pairing(graph.adjacency_matrix, list(range(40)), 'blossom', timings)
+
+        self.assertEqual(sorted(vertex for pair in greedy for vertex in pair), list(range(40)))
+        self.assertEqual(sorted(vertex for pair in blossom for vertex in pair), list(range(40)))
+        self.assertLessEqual(sum(graph.adjacency_matrix.distance(*pair) for pair in blossom),
+                             sum(graph.adjacency_matrix.distance(*pair) for pair in greedy) + 1e-6)
+        self.assertEqual(sorted(timings), ['blossom', 'greedy'])
+
+
 class TestNearestNeighbour(unittest.TestCase):
     def test_nearest_neighbour(self):
         graph1 = Graph(5, [Vertex(0, 1, 1), Vertex(1, 10, 1), Vertex(2, 10, 10), Vertex(3, 20, 20), Vertex(4, 100, 50)])
@@ -30,6 +309,28 @@ class TestNearestNeighbour(unittest.TestCase):
         self.assertIsInstance(nn_sequence2, list)
 
 
+class TestSpaceFillingCurve(unittest.TestCase):
+    def test_hilbert_index(self):
+        coordinates = np.array([[0, 0], [0, 1], [1, 1], [1, 0]])
+
+        self.assertEqual(hilbert_index(coordinates, 1).tolist(), [0, 1, 2, 3])
+        points = np.array([(x, y) for x in range(8) for y in range(8)])
+        index = hilbert_index(points, 3)
+        self.assertEqual(sorted(index.tolist()), list(range(64)))
+        ordered = points[np.argsort(index)]
+        self.assertTrue(np.all(np.abs(np.diff(ordered, axis=0)).sum(axis=1) == 1))
+
+    def test_hilbert_curve(self):
+        graph = Graph(500)
+
+        sequence = hilbert_curve(graph)
+
+        self.assertEqual(sequence[0], sequence[-1])
+        self.assertEqual(sorted(sequence[:-1]), list(range(500)))
+        self.assertLess(calculate_distance(graph.adjacency_matrix, sequence),
+                        calculate_distance(graph.adjacency_matrix, list(range(500)) + [0]))
+
+
 class TestCheapestLink(unittest.TestCase):
     def test_cheapest_link(self):
         graph1 = Graph(6, [Vertex(0, 10, 10), Vertex(1, 110, 10), Vertex(2, 50, 500), Vertex(3, 110, 500),
@@ -41,6 +342,498 @@ class TestCheapestLink(unittest.TestCase):
         self.assertEqual(chl_sequence1, total_sequence1)
         self.assertIsInstance(chl_sequence1, list)
 
+    def test_cheapest_link_candidates(self):
+        graph = Graph(300)
+
+        sequence = cheapest_link(graph, k=3)
+        path = return_path_from_sequence_pairs(sequence)
+
+        self.assertEqual(len(sequence), 299)
+        self.assertEqual(sorted(path[:-1]), list(range(300)))
+
+
+class TestLocalSearch(unittest.TestCase):
+    def test_two_opt(self):
+        # square with crossing edges 0-2 and 1-3
+        graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 10, 10), Vertex(3, 0, 10)])
+
+        sequence = improve_tour(graph, [0, 2, 1, 3, 0], or_opt=False)
+
+        self.assertEqual(calculate_distance(graph.adjacency_matrix, sequence), 40)
+
+    def test_or_opt(self):
+        # vertex 5 lies between 0 and 1 but is visited between 3 and 4
+        graph = Graph(6, [Vertex(0, 0, 0), Vertex(1, 20, 0), Vertex(2, 20, 10), Vertex(3, 10, 10), Vertex(4, 0, 10),
+                          Vertex(5, 10, 1)])
+        local_search = LocalSearch(graph, [0, 1, 2, 3, 5, 4, 0])
+
+        sequence = local_search.try_or_opt(5) and local_search.sequence()
+
+        self.assertEqual(sorted(sequence[:-1]), list(range(6)))
+        self.assertEqual(calculate_distance(graph.adjacency_matrix, sequence), 40 + 2 * math.sqrt(101))
+
+    def test_double_bridge(self):
+        graph = Graph(10)
+        local_search = LocalSearch(graph, list(range(10)) + [0])
+
+        local_search.double_bridge(8, 3, 2)
+
+        self.assertEqual(local_search.order, [3, 9, 0, 1, 4, 5, 6, 7, 8, 2])
+        self.assertEqual(list(local_search.position[local_search.order]), list(range(10)))
+        self.assertAlmostEqual(local_search.length, calculate_distance(graph.adjacency_matrix, local_search.sequence()))
+
+    def test_rollback(self):
+        graph = Graph(100)
+        local_search = LocalSearch(graph, nearest_neighbour(graph, 0))
+        local_search.run()
+        sequence, length = local_search.sequence(), local_search.length
+
+        local_search.checkpoint()
+        local_search.double_bridge(10, 20, 30)
+        local_search.run()
+        local_search.rollback()
+
+        self.assertEqual(local_search.sequence(), sequence)
+        self.assertAlmostEqual(local_search.length, length)
+        self.assertEqual(list(local_search.position[local_search.order]), list(range(100)))
+        self.assertFalse(any(local_search.active))
+
+    def test_improve_single_vertex(self):
+        graph = Graph(1)
+
+        self.assertEqual(improve_tour(graph, [0, 0]), [0, 0])
+        self.assertEqual(calculate_distance(graph.adjacency_matrix, [0, 0]), 0)
+
+    def test_improve_tour(self):
+        graph = Graph(300)
+        sequence = list(range(300)) + [0]
+
+        improved = improve_tour(graph, sequence)
+
+        self.assertEqual(sorted(improved[:-1]), list(range(300)))
+        self.assertEqual(improved[0], improved[-1])
+        self.assertLess(calculate_distance(graph.adjacency_matrix, improved),
+                        calculate_distance(graph.adjacency_matrix, nearest_neighbour(graph, 0)))
+
+
+class TestTour(unittest.TestCase):
+    def test_sequence_protocol(self):
+        graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 10, 10), Vertex(3, 0, 10)])
+        tour = Tour(graph.adjacency_matrix, [2, 1, 0, 3, 2])
+
+        self.assertEqual(tour.length, 40)
+        self.assertEqual(list(tour), [2, 1, 0, 3, 2])
+        self.assertEqual((len(tour), tour[0], tour[-1], tour[:-1]), (5, 2, 2, [2, 1, 0, 3]))
+        self.assertEqual(np.asarray(tour).tolist(), [2, 1, 0, 3, 2])
+        self.assertEqual((tour.successor(3), tour.predecessor(2)), (2, 3))
+        self.assertEqual(calculate_distance(graph.adjacency_matrix, tour), 40)
+
+    def test_moves(self):
+        random.seed(5)
+        for N in (3, 4, 5, 8, 30):
+            graph = Graph(N)
+            tour = Tour(graph.adjacency_matrix, list(range(N)))
+            for _ in range(300):
+                first, second = random.randrange(N), random.randrange(N)
+                length = tour.length
+                move = random.choice(['swap', 'two_opt', 'relocate', 'reverse'])
+                delta = getattr(tour, move + '_delta')(first, second)
+                getattr(tour, move)(first, second)
+
+                self.assertEqual(sorted(tour.order), list(range(N)))
+                self.assertEqual(tour.position.tolist(), [tour.order.index(vertex) for vertex in range(N)])
+                self.assertAlmostEqual(tour.length, length + delta)
+                self.assertAlmostEqual(tour.length, calculate_distance(graph.adjacency_matrix, tour.sequence()))
+                if move == 'relocate' and first != second and N >= 3:
+                    self.assertEqual(tour.predecessor(first), second)
+
+    def test_improve_tour(self):
+        graph = Graph(200)
+        tour = Tour(graph.adjacency_matrix, nearest_neighbour(graph, 0))
+
+        improved = improve_tour(graph, tour)
+
+        self.assertIsInstance(improved, Tour)
+        self.assertLess(improved.length, tour.length)
+        self.assertAlmostEqual(improved.length, calculate_distance(graph.adjacency_matrix, improved.sequence()))
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phases(self):
+        profiler = Profiler(trace_memory=True)
+
+        with profiler.phase('outer'):
+            for _ in range(3):
+                with profiler.phase('inner'):
+                    profiler.count('items', 2)
+                    data = bytearray(1 << 20)
+            del data
+            profiler.count('done')
+
+        report = profiler.report()
+        self.assertEqual(sorted(report), ['outer', 'outer/inner'])
+        self.assertEqual((report['outer']['calls'], report['outer/inner']['calls']), (1, 3))
+        self.assertEqual(report['outer/inner']['counters'], {'items': 6})
+        self.assertEqual(report['outer']['counters'], {'done': 1})
+        self.assertGreaterEqual(report['outer/inner']['peak_memory'], 1 << 20)
+        self.assertGreaterEqual(report['outer']['peak_memory'], report['outer/inner']['peak_memory'])
+        self.assertGreaterEqual(report['outer']['time'], report['outer/inner']['time'])
+
+    def test_solvers(self):
+        profiler = Profiler()
+        graph = Graph(300, profiler=profiler)
+
+        random.seed(2)
+        sequence = christofides(graph, profiler=profiler)
+        nearest_neighbour(graph, 0, profiler)
+        cheapest_link(graph, profiler=profiler)
+
+        report = profiler.report()
+        for phase in ('graph/adjacency_matrix', 'nearest_neighbour/search', 'cheapest_link/join', 'christofides/mst',
+                      'christofides/matching', 'christofides/eulerian_cycle', 'christofides/remove_duplicates'):
+            self.assertIn(phase, report)
+        self.assertEqual(report['graph/adjacency_matrix']['counters']['distances'], 300 * 299 // 2)
+        self.assertEqual(report['christofides/mst']['counters']['edges'], 299)
+        self.assertEqual(report['cheapest_link/join']['counters']['edges_added'] +
+                         report.get('cheapest_link/fragment_ends', {'counters': {}})['counters'].get('edges_added', 0),
+                         299)
+        random.seed(2)
+        self.assertEqual(christofides(graph), sequence)
+
+
+class TestAnytime(unittest.TestCase):
+    def test_solve_anytime(self):
+        graph = Graph(200)
+
+        sequence, distance, timeline = solve_anytime(graph, 0.5, seed=1)
+
+        self.assertEqual(sorted(sequence[:-1]), list(range(200)))
+        self.assertAlmostEqual(distance, calculate_distance(graph.adjacency_matrix, sequence))
+        self.assertEqual(timeline[-1][1], distance)
+        self.assertEqual([best for elapsed, best in timeline], sorted((best for elapsed, best in timeline),
+                                                                      reverse=True))
+
+    def test_initial_tour(self):
+        graph = Graph(100)
+        initial, _, _ = solve_anytime(graph, 0.2, seed=1)
+
+        sequence, distance, timeline = solve_anytime(graph, 0.0, seed=2, initial=initial)
+
+        self.assertLessEqual(distance, calculate_distance(graph.adjacency_matrix, initial) + 1e-9)
+
+    def test_target(self):
+        graph = Graph(100)
+
+        sequence, distance, timeline = solve_anytime(graph, 60, seed=1, target=math.inf)
+
+        self.assertEqual(len(timeline), 1)
+
+    def test_budget_of_large_graph(self):
+        graph = Graph(20000, matrix_free=True)
+        start_time = time.perf_counter()
+
+        sequence, distance, timeline = solve_anytime(graph, 1.0, seed=1)
+
+        # generous margin, constructions that do not fit take several times the budget
+        self.assertLess(time.perf_counter() - start_time, 3.0)
+        self.assertEqual(len(sequence), 20001)
+
+
+class TestLowerBound(unittest.TestCase):
+    def test_bound_of_small_graphs(self):
+        for seed in range(3):
+            random.seed(seed)
+            graph = Graph(8)
+            optimum = min(calculate_distance(graph.adjacency_matrix, [0, *permutation, 0])
+                          for permutation in itertools.permutations(range(1, 8)))
+
+            bound, penalties = held_karp_bound(graph)
+
+            self.assertLessEqual(bound, optimum + 1e-6)
+            self.assertGreater(bound, 0.9 * optimum)
+
+    def test_one_tree(self):
+        graph = Graph(300)
+        first, second, lengths = candidate_edges(graph.adjacency_matrix, 299)
+        penalties = np.random.default_rng(1).normal(0, 10, 300)
+
+        length, degrees = one_tree(graph.adjacency_matrix, penalties)
+        sparse_length, sparse_degrees = sparse_one_tree(300, first, second, lengths, penalties)
+
+        self.assertAlmostEqual(length, sparse_length, places=6)
+        self.assertEqual(degrees.sum(), 600)
+        self.assertEqual(sparse_degrees.sum(), 600)
+
+    def test_gap(self):
+        graph = Graph(400)
+        distance = calculate_distance(graph.adjacency_matrix, improve_tour(graph, christofides(graph)))
+
+        bound, penalties = held_karp_bound(graph, iterations=50)
+
+        self.assertTrue(0 < optimality_gap(distance, bound) < 0.15)
+
+
+class TestCache(unittest.TestCase):
+    def test_instance_key(self):
+        coordinates = np.array([[0, 0], [3, 4], [6, 8]])
+
+        self.assertEqual(instance_key(coordinates), instance_key(coordinates.astype(np.float64)))
+        self.assertNotEqual(instance_key(coordinates), instance_key(coordinates[::-1]))
+
+    def test_cached_graph(self):
+        coordinates = np.random.default_rng(3).random((50, 2)) * 100
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory)
+            graph = cached_graph(cache, coordinates)
+            profiler = Profiler()
+
+            cached = cached_graph(cache, coordinates, profiler=profiler)
+
+            self.assertEqual(profiler.report()['cache']['counters'], {'hits': 1})
+            np.testing.assert_array_equal(cached.adjacency_matrix.data, graph.adjacency_matrix.data)
+            self.assertEqual(cached.adjacency_matrix.distance(3, 7), graph.adjacency_matrix.distance(3, 7))
+
+    def test_tours(self):
+        graph = Graph(60)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory)
+            sequence, distance, elapsed = cached_solve(cache, graph, 'nearest_neighbour', 5)
+
+            self.assertEqual(cached_solve(cache, graph, 'nearest_neighbour', 5), (sequence, distance, 0.0))
+            self.assertEqual(cache.load_tour(graph.coordinates), (sequence, distance))
+            self.assertFalse(cache.store_tour(graph.coordinates, sequence, distance + 1, 'christofides', 1))
+            self.assertTrue(cache.store_tour(graph.coordinates, sequence[::-1], distance - 1, 'christofides', 2))
+            self.assertEqual(cache.load_tour(graph.coordinates)[1], distance - 1)
+            self.assertIsNone(cache.load_tour(graph.coordinates, 'cheapest_link', 5))
+
+    def test_concurrent_best_tour(self):
+        graph = Graph(30)
+        sequence = list(range(30)) + [0]
+        distances = [float(distance) for distance in range(100, 0, -1)]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory)
+            with ThreadPoolExecutor(8) as executor:
+                list(executor.map(lambda distance: cache.store_tour(graph.coordinates, sequence, distance),
+                                  distances[::-1] + distances))
+
+            self.assertEqual(cache.load_tour(graph.coordinates)[1], 1.0)
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory, max_size=3000)
+            first, second = np.zeros((20, 2)), np.ones((20, 2))
+            cache.store_distances(first, np.zeros(190))
+            os.utime(os.path.join(directory, os.listdir(directory)[0]), (0, 0))
+            cache.store_distances(second, np.zeros(190))
+
+            self.assertIsNone(cache.load_distances(first))
+            self.assertIsNotNone(cache.load_distances(second))
+
+
+class TestPortfolio(unittest.TestCase):
+    def test_portfolio_tasks(self):
+        tasks = portfolio_tasks(3, 7)
+
+        self.assertEqual([algorithm for algorithm, seed in tasks], ['nearest_neighbour'] * 3 + ['cheapest_link'] +
+                         ['christofides'] * 3)
+        self.assertEqual(tasks, portfolio_tasks(3, 7))
+        self.assertNotEqual(tasks, portfolio_tasks(3, 8))
+
+    def test_solve_portfolio(self):
+        graph = Graph(100)
+
+        sequence, distance, algorithm, statistics = solve_portfolio(graph, 3, seed=2, processes=2)
+
+        self.assertEqual(sorted(sequence[:-1]), list(range(100)))
+        self.assertAlmostEqual(distance, calculate_distance(graph.adjacency_matrix, sequence))
+        self.assertEqual(distance, min(values['best'] for values in statistics.values()))
+        self.assertEqual(statistics[algorithm]['best'], distance)
+        self.assertEqual(statistics['cheapest_link']['runs'], 1)
+        self.assertEqual(solve_portfolio(graph, 3, seed=2, processes=1)[:3], (sequence, distance, algorithm))
+
+
+class TestPartition(unittest.TestCase):
+    def test_kd_partition(self):
+        coordinates = np.random.default_rng(4).random((1000, 2))
+
+        cells = kd_partition(coordinates, 100)
+
+        self.assertTrue(all(50 <= len(cell) <= 100 for cell in cells))
+        self.assertEqual(sorted(np.concatenate(cells).tolist()), list(range(1000)))
+
+    def test_stitch(self):
+        coordinates = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [3, 0], [4, 0], [4, 1], [3, 1]], dtype=float)
+
+        tour, seams = stitch(coordinates, [np.array([0, 1, 2, 3]), np.array([4, 5, 6, 7])])
+
+        self.assertEqual(sorted(tour.tolist()), list(range(8)))
+        self.assertAlmostEqual(np.hypot(*(coordinates[tour] - np.roll(coordinates[tour], -1, axis=0)).T).sum(), 10)
+        self.assertEqual(len(seams), 2)
+
+    def test_solve_partitioned(self):
+        graph = Graph(600, matrix_free=True)
+
+        sequence, distance, statistics = solve_partitioned(graph, 'christofides', 100, seed=3, processes=2)
+
+        self.assertEqual(sorted(sequence[:-1]), list(range(600)))
+        self.assertAlmostEqual(distance, calculate_distance(graph.adjacency_matrix, sequence))
+        self.assertEqual(sum(vertices for vertices, elapsed in statistics['cells']), 600)
+        self.assertEqual(solve_partitioned(graph, 'christofides', 100, seed=3, processes=1)[0], sequence)
+
+
+class TestBatch(unittest.TestCase):
+    def test_parse_instances(self):
+        lines = ['# square\n', '0, 0\n', '10, 0\n', '10, 10\n', '0, 10\n', '\n', '1, 1\n', '5, 5\n', '9, 1\n']
+
+        self.assertEqual(list(parse_instances(lines, 'file')), [('square', ['0, 0', '10, 0', '10, 10', '0, 10']),
+                                                                ('file:1', ['1, 1', '5, 5', '9, 1'])])
+        self.assertEqual(list(parse_instances(lines[6:], 'file')), [('file', ['1, 1', '5, 5', '9, 1'])])
+
+    def test_solve_batch(self):
+        instances = [('square', ['0, 0', '10, 0', '10, 10', '0, 10']), ('pairs', [(1, 1), (5, 5), (9, 1), (5, 0)]),
+                     ('broken', ['1, 1', '2']), ('whitespace', ['0 0', '10\t0', '10 10', '0  10'])]
+
+        results = sorted(solve_batch(instances, 'nearest_neighbour', improve=True, processes=2),
+                         key=lambda result: result['index'])
+
+        self.assertEqual([result['instance'] for result in results], ['square', 'pairs', 'broken', 'whitespace'])
+        self.assertEqual(results[0]['distance'], 40)
+        self.assertEqual(sorted(results[1]['tour'][:-1]), [0, 1, 2, 3])
+        self.assertIn('improve', results[1]['timings'])
+        self.assertIn('error', results[2])
+        self.assertEqual(results[3]['distance'], 40)
+
+
+class TestDaemon(unittest.TestCase):
+    def test_solve_request(self):
+        coordinates = [[0, 0], [3, 0], [3, 4], [0, 4]]
+
+        first = solve_request({'coordinates': coordinates, 'algorithm': 'nearest_neighbour', 'improve': True})
+        second = solve_request({'coordinates': coordinates, 'algorithm': 'nearest_neighbour'})
+
+        self.assertAlmostEqual(first['distance'], 14)
+        self.assertEqual(sorted(first['tour'][:-1]), [0, 1, 2, 3])
+        self.assertTrue(second['warm'])
+        self.assertIn('error', solve_request({'coordinates': [[0, 0]]}))
+        self.assertIn('error', solve_request({'coordinates': coordinates, 'algorithm': 'unknown'}))
+
+    def test_server(self):
+        async def scenario(path):
+            loop = asyncio.get_running_loop()
+            stop, ready = asyncio.Event(), asyncio.Event()
+            server = asyncio.create_task(run_server(path, 2, stop, ready.set))
+            await ready.wait()
+            requests = [{'coordinates': [[0, 0], [1, 0], [1, 1], [0, 1]], 'id': number} for number in range(4)]
+            responses = await asyncio.gather(*(loop.run_in_executor(None, send_request, path, request)
+                                               for request in requests))
+            responses.append(await loop.run_in_executor(None, send_request, path, requests[0]))
+            stop.set()
+            await server
+            return responses
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'solver.sock')
+            responses = asyncio.run(scenario(path))
+
+            self.assertEqual([response['id'] for response in responses], [0, 1, 2, 3, 0])
+            self.assertTrue(responses[-1]['warm'])
+            self.assertTrue(all(response['distance'] == 4 for response in responses))
+            self.assertTrue(all('total' in response['timings'] for response in responses))
+            self.assertFalse(os.path.exists(path))
+
+    def test_long_request(self):
+        async def scenario(path):
+            loop = asyncio.get_running_loop()
+            stop, ready = asyncio.Event(), asyncio.Event()
+            server = asyncio.create_task(run_server(path, 1, stop, ready.set))
+            await ready.wait()
+            request = {'coordinates': [[number, number] for number in range(1000)]}
+            response = await loop.run_in_executor(None, send_request, path, request)
+            stop.set()
+            await server
+            return response
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch('daemon.REQUEST_LIMIT', 1024):
+            response = asyncio.run(scenario(os.path.join(directory, 'solver.sock')))
+
+        self.assertIn('longer than 1024 bytes', response['error'])
+
+
+class TestLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_load_text(self):
+        path = self.write('vertices.txt', '10, 10\n20,20\n\n  30 \t 40.5\n1e2, -5')
+
+        self.assertEqual(load_text(path).tolist(), [[10, 10], [20, 20], [30, 40.5], [100, -5]])
+        self.assertEqual(load_text(path, chunk_size=3).tolist(), [[10, 10], [20, 20], [30, 40.5], [100, -5]])
+        self.assertEqual(load_text(self.write('empty.txt', '')).shape, (0, 2))
+
+    def test_load_text_errors(self):
+        with self.assertRaisesRegex(ValueError, 'line 3'):
+            load_text(self.write('columns.txt', '1, 2\n3, 4\n5, 6, 7\n8\n'))
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            load_text(self.write('invalid.txt', '1, 2\n3, x\n'))
+
+    def test_load_tsplib(self):
+        path = self.write('instance.tsp', 'NAME : instance\nTYPE : TSP\nDIMENSION : 3\nEDGE_WEIGHT_TYPE : EUC_2D\n'
+                                          'NODE_COORD_SECTION\n2 5.5 6\n1 1 2\n3 7 8\nEOF\n')
+
+        self.assertEqual(load_tsplib(path).tolist(), [[1, 2], [5.5, 6], [7, 8]])
+        with self.assertRaisesRegex(ValueError, 'EDGE_WEIGHT_TYPE'):
+            load_tsplib(self.write('geo.tsp', 'EDGE_WEIGHT_TYPE: GEO\nNODE_COORD_SECTION\n1 1 2\nEOF\n'))
+
+    def test_load_graph(self):
+        path = os.path.join(self.directory.name, 'vertices.npy')
+        save_binary(path, [[0, 0], [3, 4], [6, 8]])
+
+        self.assertIsInstance(load_binary(path), np.memmap)
+        graph = load_graph(path)
+        self.assertEqual(graph.N, 3)
+        self.assertEqual(graph.adjacency_matrix.distance(0, 2), 10)
+        self.assertEqual(load_graph(self.write('vertices.txt', '0, 0\n3, 4\n6, 8\n')).coordinates.tolist(),
+                         graph.coordinates.tolist())
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_coordinates(self):
+        for distribution in DISTRIBUTIONS:
+            coordinates = generate_coordinates(50, distribution, 3)
+            self.assertEqual(coordinates.shape, (50, 2))
+            self.assertEqual(coordinates.tolist(), generate_coordinates(50, distribution, 3).tolist())
+
+    def test_run_benchmark(self):
+        results = run_benchmark([30], seeds=[1])
+
+        self.assertEqual(len(results), 12)
+        for result in results:
+            self.assertGreater(result['time'], 0)
+            self.assertGreater(result['peak_memory'], 0)
+            if result['algorithm'] != 'graph':
+                self.assertGreater(result['distance'], 0)
+        self.assertEqual([result['distance'] for result in results],
+                         [result['distance'] for result in run_benchmark([30], seeds=[1])])
+
+    def test_compare_with_baseline(self):
+        baseline = [{'algorithm': 'christofides', 'distribution': 'uniform', 'size': 100, 'seed': 0, 'time': 10.0,
+                     'peak_memory': 1000, 'distance': 50.0}]
+        results = [dict(baseline[0], time=10.5, peak_memory=1500), dict(baseline[0], size=200, time=100.0)]
+
+        regressions = compare_with_baseline(results, baseline, 0.1)
+
+        self.assertEqual([(regression['metric'], regression['value']) for regression in regressions],
+                         [('peak_memory', 1500)])
+
 
 class TestHelperFunctions(unittest.TestCase):
     def test_return_leaf(self):
@@ -89,6 +882,26 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(path, expected_path)
         self.assertIsInstance(path, list)
 
+    def test_path_from_pairs(self):
+        generator = np.random.default_rng(3)
+        sequence = generator.permutation(5000)
+        pairs = pairs_from_path(sequence)
+        pairs[::2] = pairs[::2, ::-1]
+        pairs = pairs[generator.permutation(len(pairs))]
+
+        path = path_from_pairs(pairs)
+
+        self.assertEqual(path[0], path[-1])
+        self.assertIn(path[:-1], [sequence.tolist(), sequence[::-1].tolist()])
+        self.assertEqual(len(return_path_from_sequence_pairs(pairs.tolist())), 5001)
+        self.assertEqual(path_from_pairs([[0, 1], [1, 2], [2, 0]]), [0, 1, 2, 0])
+        self.assertEqual(pairs_from_path([3, 1, 2]).tolist(), [[3, 1], [1, 2]])
+
+    def test_path_from_pairs_errors(self):
+        for pairs in ([[0, 1], [2, 3]], [[0, 1], [1, 2], [2, 0], [3, 4], [4, 5], [5, 3]], [[0, 1], [0, 2], [0, 3]]):
+            with self.assertRaises(ValueError):
+                path_from_pairs(pairs)
+
     def test_calculate_distance(self):
         graph = Graph(4, [Vertex(0, 0, 0), Vertex(1, 10, 0), Vertex(2, 10, 10), Vertex(3, 20, 10)])
         adjacency_matrix = graph.adjacency_matrix
@@ -101,6 +914,63 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(distance, expected_distance)
         self.assertIsInstance(distance, float)
 
+    def test_plot_graph_to_file(self):
+        graph = Graph(300)
+        sequence = nearest_neighbour(graph, 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('tour.png', 'tour.svg'):
+                plot_graph(graph, sequence, 'Nearest neighbour', os.path.join(directory, name))
+                self.assertGreater(os.path.getsize(os.path.join(directory, name)), 0)
+            plot_bars(['Nearest Neighbour'], [1.0], 'Distances', 'Distances', os.path.join(directory, 'bars.png'))
+            with open(os.path.join(directory, 'tour.png'), 'rb') as f:
+                self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+
+class TestMain(unittest.TestCase):
+    def run_main(self, *argv):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main.main(list(argv))
+        return stdout.getvalue()
+
+    def test_json(self):
+        output = json.loads(self.run_main('--random', '60', '--seed', '5', '--no-plot', '--json', '--improve',
+                                          '--algorithms', 'nearest_neighbour,hilbert_curve'))
+
+        self.assertEqual(output['graph']['vertices'], 60)
+        self.assertGreater(output['startup'], 0)
+        self.assertEqual([result['algorithm'] for result in output['results']], ['nearest_neighbour', 'hilbert_curve'])
+        for result in output['results']:
+            self.assertEqual(sorted(result['tour'][:-1]), list(range(60)))
+            self.assertLessEqual(result['distance'], result['construction_distance'])
+        repeated = json.loads(self.run_main('--random', '60', '--seed', '5', '--no-plot', '--json',
+                                            '--algorithms', 'nearest_neighbour'))
+        self.assertEqual(repeated['results'][0]['distance'], output['results'][0]['construction_distance'])
+
+    def test_bound(self):
+        output = json.loads(self.run_main('--random', '80', '--seed', '5', '--no-plot', '--json', '--no-tours',
+                                          '--algorithms', 'christofides', '--improve', '--target-gap', '10'))
+
+        self.assertLess(output['lower_bound']['distance'], output['results'][0]['distance'])
+        self.assertNotIn('improve_time', output['results'][0])
+        self.assertGreater(output['results'][0]['gap'], 0)
+
+    def test_anytime_from_cached_tour(self):
+        with tempfile.TemporaryDirectory() as directory:
+            argv = ['--random', '300', '--seed', '5', '--no-plot', '--json', '--no-tours', '--cache', directory]
+            first = json.loads(self.run_main(*argv, '--anytime', '0.3'))
+            second = json.loads(self.run_main(*argv, '--anytime', '0'))
+
+        self.assertLessEqual(second['results'][0]['timeline'][0][1], first['best_known'] + 1e-9)
+        self.assertLessEqual(second['best_known'], first['best_known'])
+
+    def test_unknown_algorithm(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main.parse_options(['--random', '10', '--algorithms', 'unknown'])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main.parse_options(['--random', '10', '--matching', 'blosom'])
+
 
 class TestChristofides(unittest.TestCase):
     def test_prims(self):
@@ -121,6 +991,40 @@ class TestChristofides(unittest.TestCase):
         self.assertEqual(neighbours, expected_neighbours)
         self.assertIsInstance(neighbours, dict)
 
+    def test_prims_candidates(self):
+        graph = Graph(200)
+
+        dense_mst, dense_neighbours = prims(graph, 'dense')
+        candidates_mst, candidates_neighbours = prims(graph, 'candidates')
+
+        self.assertEqual(len(candidates_mst), 199)
+        self.assertEqual(len(candidates_neighbours), 200)
+        self.assertAlmostEqual(sum(graph.adjacency_matrix.distance(*edge) for edge in dense_mst),
+                               sum(graph.adjacency_matrix.distance(*edge) for edge in candidates_mst))
+
+    def test_prims_separated_clusters(self):
+        vertices = [Vertex(i, i % 5, i // 5) for i in range(25)] + \
+            [Vertex(25 + i, 500 + i % 5, i // 5) for i in range(25)]
+        graph = Graph(50, vertices)
+
+        mst, neighbours = prims(graph, 'candidates')
+
+        self.assertEqual(len(mst), 49)
+        self.assertIn([4, 25], mst)
+        self.assertEqual(sorted(neighbours), list(range(50)))
+
+    def test_prims_duplicate_vertices(self):
+        locations = np.random.default_rng(2).random((30, 2)) * 1000
+        graph = Graph(600, coordinates=np.repeat(locations, 20, axis=0))
+
+        dense_mst, dense_neighbours = prims(graph, 'dense')
+        candidates_mst, candidates_neighbours = prims(graph, 'candidates')
+
+        self.assertEqual(len(candidates_mst), 599)
+        self.assertEqual(sorted(candidates_neighbours), list(range(600)))
+        self.assertAlmostEqual(sum(graph.adjacency_matrix.distance(*edge) for edge in dense_mst),
+                               sum(graph.adjacency_matrix.distance(*edge) for edge in candidates_mst))
+
     def test_return_vertices_with_odd_degree(self):
         MST = {
             0: [1, 2],
@@ -194,11 +1098,28 @@ class TestChristofides(unittest.TestCase):
         }
         expected_sequence = [0, 1, 4, 0, 2, 3, 5]
 
-        sequence = eulerian_cycle(0, 0, extended_mst, [])
+        sequence = eulerian_cycle(0, extended_mst)
 
         self.assertEqual(sequence, expected_sequence)
         self.assertIsInstance(sequence, list)
 
+    def test_eulerian_cycle_multigraph(self):
+        # edge 0-1 is in MST and also in pairing of odd vertices
+        extended_mst = {
+            0: [1, 1, 2, 3],
+            1: [0, 0],
+            2: [0, 3],
+            3: [2, 0]
+        }
+        expected_edges = sorted(sorted([u, v]) for u in extended_mst for v in extended_mst[u] if u < v)
+
+        sequence = eulerian_cycle(2, extended_mst)
+        edges = sorted(sorted(pair) for pair in zip(sequence, sequence[1:] + sequence[:1]))
+
+        self.assertEqual(len(sequence), 5)
+        self.assertEqual(edges, expected_edges)
+        self.assertEqual(extended_mst[1], [0, 0])
+
     def test_check_cycle(self):
         neighbours = {
             0: [1, 2, 4, 5],
@@ -237,4 +1158,8 @@ class TestChristofides(unittest.TestCase):
 
         # whole sequence cannot be tested due to random choice of starting vertex
 
-        self.assertIsInstance(sequence, list)
\ No newline at end of file
+        self.assertIsInstance(sequence, list)
+
+        sequence = christofides(graph, matching='blossom')
+
+        self.assertEqual(sorted(sequence[:-1]), [0, 1, 2, 3, 4])
\ No newline at end of file
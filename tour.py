@@ -0,0 +1,176 @@
+import numpy as np
+
+
+class Tour:
+    """
+    hamiltonian circuit stored as an order of vertices together with positions of vertices and its cached length,
+    moves update the length by their delta so the tour is never scanned again, the tour behaves as a sequence
+    of vertices with the starting vertex at the end so it can be passed to functions that expect such sequences
+    """
+    def __init__(self, adjacency_matrix, sequence):
+        """
+        :param adjacency_matrix: adjacency matrix of a graph (DistanceMatrix or DistanceOracle)
+        :param sequence: sequence of vertices that form a hamiltonian circuit, the starting vertex may be repeated
+        at the end
+        """
+        order = [int(vertex) for vertex in sequence]
+        if len(order) > 1 and order[0] == order[-1]:
+            order.pop()
+        self.adjacency_matrix = adjacency_matrix
+        self.order = order
+        self.N = len(order)
+        self.position = np.full(max(len(adjacency_matrix), self.N), -1, dtype=np.int64)
+        self.position[order] = np.arange(self.N)
+        self.length = self.compute_length()
+
+    def __len__(self):
+        return self.N + 1 if self.N else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.sequence()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('tour index out of range')
+        return self.order[index % self.N]
+
+    def __iter__(self):
+        yield from self.order
+        if self.order:
+            yield self.order[0]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.sequence(), dtype=dtype or np.int64)
+
+    def sequence(self):
+        """
+        :return: sequence of vertices with the starting vertex at the end
+        """
+        return self.order + self.order[:1]
+
+    def compute_length(self):
+        """
+        :return: length of the tour computed from all its edges
+        """
+        if self.N < 2:
+            return 0.0
+        order = np.asarray(self.order, dtype=np.int64)
+        return float(self.adjacency_matrix.distances(order, np.roll(order, -1)).sum(dtype=np.float64))
+
+    def distance(self, first: int, second: int):
+        return self.adjacency_matrix.distance(first, second)
+
+    def successor(self, vertex: int):
+        return self.order[(self.position.item(vertex) + 1) % self.N]
+
+    def predecessor(self, vertex: int):
+        return self.order[self.position.item(vertex) - 1]
+
+    def reverse_delta(self, first: int, last: int):
+        """
+        :return: change of the length after reversal of part of the tour from position first to position last
+        """
+        if (last - first) % self.N + 1 >= self.N:
+            return 0.0
+        previous, following = self.order[first - 1], self.order[(last + 1) % self.N]
+        first_vertex, last_vertex = self.order[first], self.order[last]
+        return self.distance(previous, last_vertex) + self.distance(first_vertex, following) - \
+            self.distance(previous, first_vertex) - self.distance(last_vertex, following)
+
+    def reverse(self, first: int, last: int):
+        """
+        reverse part of the tour from position first to position last (going forward, possibly over the end)
+        in time proportional to the length of the part
+        """
+        self.length += self.reverse_delta(first, last)
+        order = self.order
+        if first <= last:
+            order[first:last + 1] = order[first:last + 1][::-1]
+            self.position[order[first:last + 1]] = np.arange(first, last + 1)
+        else:
+            segment = (order[first:] + order[:last + 1])[::-1]
+            order[first:] = segment[:self.N - first]
+            order[:last + 1] = segment[self.N - first:]
+            self.position[segment] = np.arange(first, first + len(segment)) % self.N
+
+    def swap_delta(self, first: int, second: int):
+        """
+        :return: change of the length after swapping vertices first and second
+        """
+        first, second = self.position.item(first), self.position.item(second)
+        if first == second:
+            return 0.0
+
+        def vertex_at(position):
+            return self.order[second] if position == first else \
+                self.order[first] if position == second else self.order[position]
+
+        edges = {(first - 1) % self.N, first, (second - 1) % self.N, second}
+        delta = 0.0
+        for edge in edges:
+            following = (edge + 1) % self.N
+            delta += self.distance(vertex_at(edge), vertex_at(following)) - \
+                self.distance(self.order[edge], self.order[following])
+        return delta
+
+    def swap(self, first: int, second: int):
+        """
+        swap positions of vertices first and second in O(1)
+        """
+        self.length += self.swap_delta(first, second)
+        first_position, second_position = self.position.item(first), self.position.item(second)
+        self.order[first_position], self.order[second_position] = second, first
+        self.position[first], self.position[second] = second_position, first_position
+
+    def two_opt_delta(self, first: int, second: int):
+        """
+        :return: change of the length after replacing edges (first, successor of first) and
+        (second, successor of second) by edges (first, second) and (successor of first, successor of second)
+        """
+        if first == second:
+            return 0.0
+        first_next, second_next = self.successor(first), self.successor(second)
+        return self.distance(first, second) + self.distance(first_next, second_next) - \
+            self.distance(first, first_next) - self.distance(second, second_next)
+
+    def two_opt(self, first: int, second: int):
+        """
+        apply 2-opt move evaluated by two_opt_delta, the shorter of the two paths between removed edges is reversed
+        """
+        if first == second:
+            return
+        start, end = (self.position.item(first) + 1) % self.N, self.position.item(second)
+        if ((end - start) % self.N + 1) * 2 > self.N:
+            start, end = (self.position.item(second) + 1) % self.N, self.position.item(first)
+        self.reverse(start, end)
+
+    def relocate_delta(self, vertex: int, after: int):
+        """
+        :return: change of the length after moving vertex between vertex after and its successor
+        """
+        if vertex == after or self.N < 3:
+            return 0.0
+        previous, following = self.predecessor(vertex), self.successor(vertex)
+        if after == previous:
+            return 0.0
+        after_next = self.successor(after)
+        return self.distance(previous, following) - self.distance(previous, vertex) - \
+            self.distance(vertex, following) + self.distance(after, vertex) + self.distance(vertex, after_next) - \
+            self.distance(after, after_next)
+
+    def relocate(self, vertex: int, after: int):
+        """
+        move vertex between vertex after and its successor, positions of the vertices between the old
+        and the new position of vertex are updated
+        """
+        delta = self.relocate_delta(vertex, after)
+        if vertex == after or after == self.predecessor(vertex) or self.N < 3:
+            return
+        self.length += delta
+        source = self.position.item(vertex)
+        del self.order[source]
+        target = self.position.item(after) + (0 if self.position.item(after) > source else 1)
+        self.order.insert(target, vertex)
+        low, high = min(source, target), max(source, target)
+        self.position[self.order[low:high + 1]] = np.arange(low, high + 1)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from tour import Tour
+
+
+def repaired_tour(sequence, order: list):
+    """
+    :param sequence: repaired sequence of vertices that form a hamiltonian circuit (or Tour)
+    :param order: vertices of the repaired tour without the starting vertex at the end
+    :return: new sequence of vertices that form a hamiltonian circuit, or Tour if sequence is a Tour
+    """
+    if isinstance(sequence, Tour):
+        return Tour(sequence.adjacency_matrix, order)
+    return order + order[:1]
+
+
+def insert_vertex(graph, sequence, vertex: int):
+    """
+    insert vertex into a tour between the pair of consecutive vertices where it makes the tour the least longer
+    (cheapest insertion), O(N)
+    :param graph: class Graph that already contains the vertex
+    :param sequence: sequence of vertices that form a hamiltonian circuit without the vertex (or Tour)
+    :param vertex: inserted vertex
+    :return: new sequence of vertices that form a hamiltonian circuit, or Tour if sequence is a Tour
+    """
+    order = list(sequence)[:-1]
+    if not order:
+        return repaired_tour(sequence, [vertex])
+    first = np.asarray(order, dtype=np.int64)
+    second = np.roll(first, -1)
+    lengths = graph.adjacency_matrix.distances_from(vertex)
+    increase = lengths[first] + lengths[second] - graph.adjacency_matrix.distances(first, second)
+    order.insert(int(np.argmin(increase)) + 1, vertex)
+    return repaired_tour(sequence, order)
+
+
+def remove_vertex(sequence, vertex: int, moved=None):
+    """
+    splice vertex out of a tour, its predecessor and successor are joined, O(N)
+    :param sequence: sequence of vertices that form a hamiltonian circuit (or Tour)
+    :param vertex: removed vertex
+    :param moved: former index of the vertex that took the index of the removed vertex, as returned
+    by Graph.remove_vertex, it is renamed to the index of the removed vertex
+    :return: new sequence of vertices that form a hamiltonian circuit, or Tour if sequence is a Tour
+    """
+    order = [other for other in list(sequence)[:-1] if other != vertex]
+    if moved is not None:
+        order = [vertex if other == moved else other for other in order]
+    return repaired_tour(sequence, order)
+
+
+def move_vertex(graph, sequence, vertex: int):
+    """
+    repair a tour after vertex was moved by Graph.move_vertex, vertex is spliced out
+    and inserted again at the cheapest place
+    :param graph: class Graph with new coordinates of the vertex
+    :param sequence: sequence of vertices that form a hamiltonian circuit (or Tour)
+    :param vertex: moved vertex
+    :return: new sequence of vertices that form a hamiltonian circuit, or Tour if sequence is a Tour
+    """
+    return insert_vertex(graph, remove_vertex(sequence, vertex), vertex)
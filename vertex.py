@@ -1,5 +1,10 @@
 import random
 import math
+from functools import lru_cache
+
+import numpy as np
+
+from profiler import NULL_PROFILER
 
 MAX_HEIGHT = 1000
 MAX_WIDTH = 1000
@@ -7,6 +12,8 @@ DIAGONAL_LENGTH = math.sqrt(MAX_WIDTH ** 2 + MAX_HEIGHT ** 2)
 
 
 class Vertex:
+    __slots__ = ('info', 'x', 'y')
+
     def __init__(self, info, x, y):
         self.info = info
         self.x = x
@@ -16,51 +23,408 @@ class Vertex:
         return self.x, self.y
 
 
+class VertexView:
+    """
+    read-only list-like view of vertices of a graph, Vertex objects are created on access
+    from the arrays of the graph, so changes of returned vertices do not change the graph
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return self.graph.N
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vertex index out of range')
+        x, y = self.graph.coordinates[index].tolist()
+        return Vertex(self.graph.labels[index].item(), x, y)
+
+    def __iter__(self):
+        labels = self.graph.labels.tolist()
+        for info, (x, y) in zip(labels, self.graph.coordinates.tolist()):
+            yield Vertex(info, x, y)
+
+
+def condensed_index(i, j):
+    """
+    :return: position of distance between vertices i > j in a condensed distance matrix
+    """
+    return i * (i - 1) // 2 + j
+
+
+class DistanceMatrix:
+    """
+    condensed distance matrix, only the lower triangle is stored in a flat array,
+    distance between vertices i > j is stored at index i * (i - 1) // 2 + j
+    """
+    # maximal number of pairwise distances computed at once, bounds peak memory
+    BLOCK_SIZE = 1 << 18
+
+    def __init__(self, coordinates, dtype=np.float64, data=None):
+        """
+        :param coordinates: array of coordinates of all vertices with shape (N, 2)
+        :param dtype: type of stored distances
+        :param data: already computed condensed distances (e.g. in shared memory), computed if None
+        """
+        self.coordinates = coordinates
+        self.N = len(coordinates)
+        self.dtype = np.dtype(dtype)
+        # own array that holds data and has room for added vertices, None while data is given from outside
+        self.buffer = None
+        if data is None:
+            self.data = self.buffer = self.compute_distances()
+        else:
+            self.data = data
+
+    def __len__(self):
+        return self.N
+
+    def compute_distances(self):
+        """
+        compute distances between all pairs of vertices in blocks of rows
+        :return: flat array of distances in condensed form
+        """
+        coordinates = self.coordinates
+        data = np.empty(self.N * (self.N - 1) // 2, dtype=self.dtype)
+
+        first_row = 1
+        while first_row < self.N:
+            rows = max(1, self.BLOCK_SIZE // max(first_row, math.isqrt(self.BLOCK_SIZE)))
+            last_row = min(self.N, first_row + rows)
+            block = coordinates[first_row:last_row, None, :] - coordinates[None, :last_row - 1, :]
+            lengths = np.sqrt(np.einsum('ijk,ijk->ij', block, block))
+            mask = np.arange(last_row - 1)[None, :] < np.arange(first_row, last_row)[:, None]
+            data[condensed_index(first_row, 0):condensed_index(last_row, 0)] = lengths[mask]
+            first_row = last_row
+
+        return data
+
+    def distance(self, i: int, j: int):
+        """
+        :return: distance between vertices i and j
+        """
+        if i == j:
+            return 0.0
+        if i < j:
+            i, j = j, i
+        return float(self.data[i * (i - 1) // 2 + j])
+
+    def distances(self, first, second):
+        """
+        vectorized version of distance
+        :param first: array of vertices
+        :param second: array of vertices of the same length
+        :return: array of distances between first[k] and second[k]
+        """
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        # a graph of one vertex has no stored distances, its tour [0, 0] is still measured (e.g. by improve_tour)
+        if len(self.data) == 0:
+            return np.zeros(len(first), dtype=self.dtype)
+        larger = np.maximum(first, second)
+        smaller = np.minimum(first, second)
+        # pairs of the same vertex read any valid entry, their distance is set to 0 afterwards
+        index = condensed_index(larger, smaller)
+        index[larger == smaller] = 0
+        lengths = self.data[index]
+        return np.where(larger == smaller, 0, lengths).astype(self.dtype, copy=False)
+
+    def distances_from(self, i: int):
+        """
+        :param i: vertex
+        :return: array of distances from vertex i to all vertices (including itself)
+        """
+        lengths = np.empty(self.N, dtype=self.dtype)
+        lengths[:i] = self.data[condensed_index(i, 0):condensed_index(i, i)]
+        lengths[i] = 0
+        larger = np.arange(i + 1, self.N, dtype=np.int64)
+        lengths[i + 1:] = self.data[condensed_index(larger, i)]
+        return lengths
+
+    def compute_distances_from(self, i: int):
+        """
+        :return: array of distances from vertex i to all vertices computed from coordinates
+        """
+        difference = self.coordinates - self.coordinates[i]
+        return np.sqrt(np.einsum('ij,ij->i', difference, difference))
+
+    def set_distances_from(self, i: int, lengths):
+        """
+        store distances from vertex i to all vertices, i.e. row and column i of the matrix
+        """
+        self.data[condensed_index(i, 0):condensed_index(i, i)] = lengths[:i]
+        self.data[condensed_index(np.arange(i + 1, self.N, dtype=np.int64), i)] = lengths[i + 1:]
+
+    def reserve(self, size: int):
+        """
+        make sure data is stored in an own buffer with room for size distances, the buffer grows geometrically
+        so adding vertices one by one costs amortized O(N) per vertex
+        """
+        if self.buffer is not None and len(self.buffer) >= size:
+            return
+        buffer = np.empty(size if size <= len(self.data) else max(size, 2 * len(self.data)), dtype=self.dtype)
+        buffer[:len(self.data)] = self.data
+        self.buffer = buffer
+        self.data = buffer[:len(self.data)]
+
+    def add_vertex(self, coordinates):
+        """
+        add distances of the last vertex of coordinates in O(N), they are appended at the end of the condensed matrix
+        :param coordinates: array of coordinates of all vertices including the added one
+        """
+        self.coordinates = coordinates
+        size = condensed_index(len(coordinates), 0)
+        self.reserve(size)
+        self.data = self.buffer[:size]
+        self.data[condensed_index(self.N, 0):] = self.compute_distances_from(self.N)[:self.N]
+        self.N = len(coordinates)
+
+    def remove_vertex(self, i: int, coordinates):
+        """
+        remove vertex i in O(N), the last vertex takes its index so only row and column i change
+        :param coordinates: array of coordinates of all vertices after the removal
+        """
+        last = self.N - 1
+        self.reserve(len(self.data))
+        lengths = self.distances_from(last)[:last]
+        self.coordinates = coordinates
+        self.N = last
+        self.data = self.buffer[:condensed_index(last, 0)]
+        if i < last:
+            lengths[i] = 0
+            self.set_distances_from(i, lengths)
+
+    def move_vertex(self, i: int, coordinates):
+        """
+        recompute distances of vertex i in O(N)
+        :param coordinates: array of coordinates of all vertices with the new coordinates of vertex i
+        """
+        self.reserve(len(self.data))
+        self.coordinates = coordinates
+        self.set_distances_from(i, self.compute_distances_from(i))
+
+
+class DistanceOracle:
+    """
+    matrix-free replacement of DistanceMatrix, stores only coordinates of the vertices
+    and computes distances on demand, recently used pairs are kept in a bounded LRU cache
+    """
+    def __init__(self, coordinates, dtype=np.float64, cache_size=1 << 16):
+        self.coordinates = coordinates
+        self.N = len(coordinates)
+        self.dtype = np.dtype(dtype)
+        self.xs = coordinates[:, 0].tolist()
+        self.ys = coordinates[:, 1].tolist()
+        self.cached_distance = lru_cache(maxsize=cache_size)(self.compute_distance)
+
+    def __len__(self):
+        return self.N
+
+    def compute_distance(self, i: int, j: int):
+        """
+        :return: distance between vertices i and j computed from their coordinates
+        """
+        return math.sqrt((self.xs[i] - self.xs[j]) ** 2 + (self.ys[i] - self.ys[j]) ** 2)
+
+    def distance(self, i: int, j: int):
+        """
+        :return: distance between vertices i and j
+        """
+        if i == j:
+            return 0.0
+        if i < j:
+            i, j = j, i
+        return self.cached_distance(i, j)
+
+    def distances(self, first, second):
+        """
+        vectorized version of distance
+        :param first: array of vertices
+        :param second: array of vertices of the same length
+        :return: array of distances between first[k] and second[k]
+        """
+        difference = self.coordinates[np.asarray(first, dtype=np.int64)] - \
+            self.coordinates[np.asarray(second, dtype=np.int64)]
+        return np.sqrt(np.einsum('ij,ij->i', difference, difference)).astype(self.dtype, copy=False)
+
+    def distances_from(self, i: int):
+        """
+        :param i: vertex
+        :return: array of distances from vertex i to all vertices (including itself)
+        """
+        difference = self.coordinates - self.coordinates[i]
+        return np.sqrt(np.einsum('ij,ij->i', difference, difference)).astype(self.dtype, copy=False)
+
+    def add_vertex(self, coordinates):
+        """
+        :param coordinates: array of coordinates of all vertices including the added last one
+        """
+        self.coordinates = coordinates
+        self.N = len(coordinates)
+        x, y = coordinates[-1].tolist()
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def remove_vertex(self, i: int, coordinates):
+        """
+        :param coordinates: array of coordinates of all vertices after the removal, the last vertex took index i
+        """
+        self.coordinates = coordinates
+        self.N = len(coordinates)
+        self.xs[i], self.ys[i] = self.xs[-1], self.ys[-1]
+        self.xs.pop()
+        self.ys.pop()
+        self.cached_distance.cache_clear()
+
+    def move_vertex(self, i: int, coordinates):
+        """
+        :param coordinates: array of coordinates of all vertices with the new coordinates of vertex i
+        """
+        self.coordinates = coordinates
+        self.xs[i], self.ys[i] = coordinates[i].tolist()
+        self.cached_distance.cache_clear()
+
+
 class Graph:
-    def __init__(self, N, vertices=None):
+    """
+    coordinates and labels of vertices are stored in arrays, vertices is a view that creates
+    Vertex objects only when they are accessed, vertices can be added, removed and moved
+    in O(N) time per change without computing the whole adjacency matrix again
+    """
+    def __init__(self, N, vertices=None, dtype=np.float64, matrix_free=False, adjacency_matrix=None,
+                 coordinates=None, profiler=None):
+        """
+        :param N: number of vertices, random vertices are generated if neither vertices nor coordinates are given,
+        ValueError is raised if they are given and their number differs
+        :param vertices: list of vertices
+        :param dtype: type of stored distances
+        :param matrix_free: compute distances on demand instead of storing the distance matrix
+        :param adjacency_matrix: already computed adjacency matrix of the vertices
+        :param coordinates: array of coordinates with shape (N, 2), labels of vertices are their indices
+        :param profiler: optional Profiler that measures phases of the construction
+        """
+        profiler = profiler or NULL_PROFILER
         self.N = N
-        self.vertices = self.initialize_vertices() if vertices is None else vertices
-        self.adjacency_matrix = self.get_adjacency_matrix()
+        self.dtype = dtype
+        self.matrix_free = matrix_free
+        with profiler.phase('graph'):
+            with profiler.phase('coordinates'):
+                self.initialize_arrays(vertices, coordinates)
+            self.vertices = VertexView(self)
+            with profiler.phase('adjacency_matrix'):
+                self.adjacency_matrix = self.get_adjacency_matrix() if adjacency_matrix is None else adjacency_matrix
+                if not matrix_free:
+                    profiler.count('distances', len(self.adjacency_matrix.data))
 
-    def initialize_vertices(self):
+    def initialize_arrays(self, vertices, coordinates):
         """
-        :param N: Number of vertices
-        :return: list of generated vertices
+        fill arrays of coordinates and labels from given coordinates, given vertices or random coordinates
         """
-        vertices = []
-
-        for i in range(self.N):
-            x = random.randint(0, MAX_WIDTH)
-            y = random.randint(0, MAX_HEIGHT)
-            vertices.append(Vertex(i, x, y))
+        if coordinates is not None:
+            self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+            self.labels = np.arange(len(self.coordinates))
+        elif vertices is not None:
+            self.coordinates = np.array([vertex.return_coordinates() for vertex in vertices],
+                                        dtype=np.float64).reshape(-1, 2)
+            self.labels = np.array([vertex.info for vertex in vertices])
+        else:
+            self.coordinates = self.initialize_coordinates()
+            self.labels = np.arange(self.N)
+        if len(self.coordinates) != self.N:
+            raise ValueError(f'N is {self.N} but {len(self.coordinates)} vertices are given')
+        # own arrays with room for added vertices, coordinates and labels are views of them once the graph changes
+        self.coordinate_buffer = None
+        self.label_buffer = None
 
-        return vertices
+    def initialize_coordinates(self):
+        """
+        generate random coordinates, the generator is seeded from the random module
+        so random.seed makes generated graphs reproducible
+        :return: array of generated coordinates with shape (N, 2)
+        """
+        generator = np.random.default_rng(random.getrandbits(64))
+        coordinates = generator.integers(0, (MAX_WIDTH + 1, MAX_HEIGHT + 1), size=(self.N, 2))
+        return coordinates.astype(np.float64)
 
-    def get_adjacency_matrix(self):
+    def reserve(self, size: int, label=None):
         """
-        calculate adjacency matrix of a graph
-        :return: adjacency matrix of a graph
+        make sure coordinates and labels are stored in own buffers with room for size vertices
+        :param label: label that has to fit into the buffer of labels, labels are stored as objects otherwise
         """
-        adjacency_matrix = []
+        dtype = self.labels.dtype
+        if label is not None and not np.can_cast(np.asarray(label).dtype, dtype, 'safe'):
+            dtype = np.dtype(object)
+        if self.coordinate_buffer is not None and len(self.coordinate_buffer) >= size and \
+                self.label_buffer.dtype == dtype:
+            return
+        capacity = max(size, 2 * self.N) if size > self.N else size
+        self.coordinate_buffer = np.empty((capacity, 2), dtype=np.float64)
+        self.coordinate_buffer[:self.N] = self.coordinates
+        self.label_buffer = np.empty(capacity, dtype=dtype)
+        self.label_buffer[:self.N] = self.labels
+        self.coordinates = self.coordinate_buffer[:self.N]
+        self.labels = self.label_buffer[:self.N]
 
-        for vertex1 in range(len(self.vertices)):
-            lengths = []
-            for vertex2 in range(vertex1+1, len(self.vertices)):
-                lengths.append(math.sqrt((self.vertices[vertex1].x - self.vertices[vertex2].x) ** 2 + (self.vertices[vertex1].y - self.vertices[vertex2].y) ** 2))
-            adjacency_matrix.append(lengths)
+    def check_index(self, index: int):
+        if not 0 <= index < self.N:
+            raise IndexError('vertex index out of range')
 
-        return adjacency_matrix
+    def add_vertex(self, x: float, y: float, info=None):
+        """
+        add a vertex, only its distances to other vertices are computed, amortized O(N)
+        :param x: x coordinate of the vertex
+        :param y: y coordinate of the vertex
+        :param info: label of the vertex, the highest integer label + 1 if None
+        :return: index of the new vertex
+        """
+        if info is None:
+            info = int(self.labels.max()) + 1 if self.N and np.issubdtype(self.labels.dtype, np.integer) else self.N
+        self.reserve(self.N + 1, info)
+        self.coordinate_buffer[self.N] = x, y
+        self.label_buffer[self.N] = info
+        self.N += 1
+        self.coordinates = self.coordinate_buffer[:self.N]
+        self.labels = self.label_buffer[:self.N]
+        self.adjacency_matrix.add_vertex(self.coordinates)
+        return self.N - 1
 
-    def get_sorted_distances(self):
+    def remove_vertex(self, index: int):
         """
-        sort edges according to their lengths from smallest to largest
-        :return: sorted list of triplets in a format: [first vertex, second vertex, length of the edge]
+        remove a vertex in O(N), the last vertex takes its index so indices of other vertices do not change
+        :param index: index of the removed vertex
+        :return: former index of the vertex that took the index of the removed vertex,
+        None if the removed vertex was the last one
         """
-        adjacency_matrix = self.adjacency_matrix
-        matrix = []
-        for first_index in range(len(adjacency_matrix)):
-            for second_index in range(len(adjacency_matrix[first_index])):
-                matrix.append(
-                    [first_index, second_index + first_index + 1, adjacency_matrix[first_index][second_index]])
+        self.check_index(index)
+        self.reserve(self.N)
+        last = self.N - 1
+        self.coordinate_buffer[index] = self.coordinate_buffer[last]
+        self.label_buffer[index] = self.label_buffer[last]
+        self.N = last
+        self.coordinates = self.coordinate_buffer[:self.N]
+        self.labels = self.label_buffer[:self.N]
+        self.adjacency_matrix.remove_vertex(index, self.coordinates)
+        return last if index < last else None
 
-        return sorted(matrix, key=lambda item: item[2])
+    def move_vertex(self, index: int, x: float, y: float):
+        """
+        change coordinates of a vertex, only its distances to other vertices are computed again, O(N)
+        """
+        self.check_index(index)
+        self.reserve(self.N)
+        self.coordinate_buffer[index] = x, y
+        self.adjacency_matrix.move_vertex(index, self.coordinates)
+
+    def get_adjacency_matrix(self):
+        """
+        calculate adjacency matrix of a graph
+        :return: condensed adjacency matrix of a graph, or distance oracle if the graph is matrix-free
+        """
+        if self.matrix_free:
+            return DistanceOracle(self.coordinates, self.dtype)
+        return DistanceMatrix(self.coordinates, self.dtype)